@@ -0,0 +1,82 @@
+// Clientside callbacks. Dash loads every script in assets/ automatically.
+
+// Women&Enterprise table: only the last hover/year change within this window renders.
+const COUNTRY_TABLE_DEBOUNCE_MS = 80;
+let countryTableRequest = 0;
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    historical: {
+        // Historical Overview with GEA_CLIENTSIDE_SLIDER=1: icons, labels, gauge
+        // and donuts for the slider year, picked from the country series store.
+        update_slider_charts: function (year, series, figures) {
+            if (!series || !figures) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const i = series.years.indexOf(year);
+            if (i < 0) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            function icon(src) {
+                if (!src) {
+                    return null;
+                }
+                return {type: "Img", namespace: "dash_html_components", props: {src: src, height: "120px"}};
+            }
+
+            function donut(percent, text) {
+                const fig = structuredClone(figures.donut);
+                fig.data[0].values = [percent, 100 - percent];
+                fig.layout.annotations[0].text = text;
+                return fig;
+            }
+
+            const gauge = structuredClone(figures.gauge);
+            gauge.data[0].value = series.law_index[i];
+            gauge.data[0].delta.reference = series.law_index_average[i];
+            gauge.data[0].gauge.threshold.value = series.law_index_average[i];
+
+            return [
+                icon(series.women_icon[i]), series.women_label[i],
+                icon(series.men_icon[i]), series.men_label[i],
+                gauge,
+                donut(series.management[i], series.management_text[i]),
+                donut(series.parliament[i], series.parliament_text[i])
+            ];
+        }
+    },
+    enterprise: {
+        // Women&Enterprise: show the year's precomputed frame of the choropleth,
+        // merged over the displayed trace.
+        show_map_year: function (year, figure) {
+            const frame = figure && (figure.frames || []).find(f => f.name === String(year));
+            if (!frame) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const data = figure.data.map((trace, i) => Object.assign({}, trace, frame.data[i]));
+            return Object.assign({}, figure, {data: data});
+        },
+
+        // Women&Enterprise: table and curiosities of the hovered country (or the
+        // default one) in the slider year, picked from the country table store.
+        show_country_table: async function (hoverData, year, table) {
+            const request = ++countryTableRequest;
+            await new Promise(resolve => setTimeout(resolve, COUNTRY_TABLE_DEBOUNCE_MS));
+            if (request !== countryTableRequest || !table) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            const country = hoverData ? hoverData.points[0].location : table.default_country;
+            const rows = table.rows[country];
+            const i = table.years.indexOf(year);
+            if (!rows || i < 0) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            const fig = structuredClone(table.figure);
+            fig.data[0].header.values = ["<b>" + country + "</b>", "<b>" + year + "</b>"];
+            fig.data[0].cells.values = [fig.data[0].cells.values[0], rows[i]];
+            return [fig, table.curiosities[country]];
+        }
+    }
+});
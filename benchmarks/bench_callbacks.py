@@ -0,0 +1,134 @@
+"""Latency and payload size of every page callback over its whole input domain.
+
+Run from the repository root:
+
+    python benchmarks/bench_callbacks.py --save-baseline   # record a baseline
+    python benchmarks/bench_callbacks.py                   # compare against it
+
+Each callback registered with ``static_export.precomputed`` is called for every
+input of its domain (every country and year for the slider charts, every
+country for the gap chart, ...) and its return value serialized
+the way Dash does. p50/p95/max latency and the median payload size are printed
+per callback. When a baseline exists, the run fails if a callback's p95 latency
+or median payload grew by more than ``--threshold`` (25% by default). It also
+fails when a callback raises for more inputs than in the baseline (for any
+input at all without a baseline).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from plotly.io.json import to_json_plotly
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import datasets  # noqa: E402
+import my_app  # noqa: E402 - imports the pages, which register their callbacks
+import static_export  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "callback_baseline.json")
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench(function, domain, max_inputs):
+    if max_inputs and len(domain) > max_inputs:
+        # Evenly spread subsample, so quick runs still cover the whole domain
+        step = len(domain) / max_inputs
+        domain = [domain[int(i * step)] for i in range(max_inputs)]
+    timings, sizes, errors = [], [], 0
+    for args in domain:
+        start = time.perf_counter()
+        try:
+            payload = to_json_plotly(function(*args))
+        except Exception:  # noqa: BLE001 - counted, like a failed Dash request
+            errors += 1
+            continue
+        timings.append(time.perf_counter() - start)
+        sizes.append(len(payload))
+    timings.sort()
+    if not timings:
+        # Every input failed
+        return {"inputs": len(domain), "errors": errors, "p50_ms": None, "p95_ms": None, "max_ms": None,
+                "bytes_p50": None}
+    return {
+        "inputs": len(domain),
+        "errors": errors,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "max_ms": timings[-1] * 1000,
+        "bytes_p50": statistics.median(sizes),
+    }
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for name, result in results.items():
+        reference = baseline.get(name, {})
+        if result["errors"] > reference.get("errors", 0):
+            found.append(f"{name}: errors {reference.get('errors', 0)} -> {result['errors']}")
+        for metric in ("p95_ms", "bytes_p50"):
+            if reference.get(metric) is None or result[metric] is None:
+                continue
+            if result[metric] > reference[metric] * (1 + threshold):
+                found.append(f"{name}: {metric} {reference[metric]:.2f} -> {result[metric]:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative growth (default 0.25)")
+    parser.add_argument("--max-inputs", type=int, default=None, help="subsample larger domains to this many inputs")
+    parser.add_argument("--callback", action="append", default=[], help="only run callbacks containing this text")
+    args = parser.parse_args()
+
+    # Load the page data up front, so it is not timed as the first input of a callback
+    my_app.warm_up()
+    results = {}
+    print(f"{'callback':<46}{'inputs':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'bytes':>9}")
+    for name, (function, domain) in static_export.REGISTRY.items():
+        module, function_name = name.split(":")
+        short_name = f"{module.split('.')[-1]}.{function_name}"
+        if args.callback and not any(text in short_name for text in args.callback):
+            continue
+        # Callbacks share derived values (e.g. country_year_snapshot) through the
+        # version caches; start each one empty, so none is timed on the values
+        # an earlier callback computed. The page-level data is built again first.
+        datasets.clear_version_caches()
+        my_app.warm_up()
+        result = results[short_name] = bench(function, list(domain()), args.max_inputs)
+        print(f"{short_name:<46}{result['inputs']:>8}{result['errors']:>8}"
+              + "".join(f"{'-' if result[metric] is None else format(result[metric], spec):>9}"
+                        for metric, spec in (("p50_ms", ".2f"), ("p95_ms", ".2f"), ("max_ms", ".2f"),
+                                             ("bytes_p50", ".0f"))))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    found = regressions(results, baseline, args.threshold)
+    if found:
+        print(f"regressions (errors, or beyond {args.threshold:.0%}):")
+        print("\n".join("  " + line for line in found))
+        sys.exit(1)
+    if baseline:
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    else:
+        print("no errors (no baseline to compare latency and payload against)")
+
+
+if __name__ == "__main__":
+    main()
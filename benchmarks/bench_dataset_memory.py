@@ -0,0 +1,37 @@
+"""Bytes per column of the loaded datasets, before and after datasets.compact.
+
+Run from the repository root:
+
+    python benchmarks/bench_dataset_memory.py
+
+"before" is the frame as parsed from the workbook (float64 indicators, int64
+years, string countries), "after" the shared frame the pages use.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datasets  # noqa: E402
+
+
+def report(name, before, after):
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    print(name)
+    print(f"  {'column':<52}{'before':>16}{'after':>17}")
+    for column in before.columns:
+        print(f"  {column[:50]:<52}{str(before[column].dtype):>8}{before_bytes[column]:>8}"
+              f"{str(after[column].dtype):>9}{after_bytes[column]:>8}")
+    total_before, total_after = before_bytes.sum(), after_bytes.sum()
+    print(f"  {'total':<52}{total_before:>16}{total_after:>17}  ({total_after / total_before:.0%})")
+
+
+def main():
+    report("statistics",
+           datasets.read_excel_cached(datasets.STATISTICS_PATH).rename(columns=datasets.STATISTICS_COLUMNS),
+           datasets.gender_statistics())
+    report("wages", datasets.read_excel_cached(datasets.WAGES_PATH), datasets.gender_wages())
+
+
+if __name__ == "__main__":
+    main()
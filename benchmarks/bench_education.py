@@ -0,0 +1,81 @@
+"""Build time and payload size of the education comparison chart with many lines.
+
+Run from the repository root:
+
+    python benchmarks/bench_education.py [--countries 27] [--repeat 5]
+
+Compares the main country against ``--countries - 1`` others, on every
+education level and both genders (162 lines for 27 countries). The chart is
+built either trace by trace with ``go.Scatter`` graph objects, as before, or
+the way the callback now does it: one array block from the statistics cube and
+``scattergl`` traces as plain dicts. Both are serialized the way Dash
+serializes a callback response.
+"""
+import argparse
+import gzip
+import inspect
+import os
+import statistics
+import sys
+import time
+
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datasets  # noqa: E402
+import my_app  # noqa: E402 - imports the pages
+
+historical_overview = sys.modules["pages.HistoricalOverview"]
+
+
+def per_trace_figure(main_country, countries, levels, genders):
+    statistics_cube = datasets.statistics_cube()
+    fig = go.Figure()
+    for country in [main_country, *countries]:
+        for level in levels:
+            for gender in genders:
+                series_name = level + " Education (% of " + gender.lower() + ")"
+                fig.add_trace(go.Scatter(x=statistics_cube.years, y=statistics_cube.series(country, series_name),
+                                         mode='lines', name=series_name + " - " + country,
+                                         line=dict(color=historical_overview.color3 if gender == "Female"
+                                                   else historical_overview.color2, width=2,
+                                                   dash=None if country == main_country else "dash")))
+    fig.update_layout(xaxis_title='Year', yaxis_title='% of Female/ Male', xaxis_range=[1998.5, 2021.5],
+                      autosize=False, width=900, height=500, legend_title_font_size=20)
+    return fig
+
+
+def measure(function, arguments, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = to_json_plotly(function(*arguments))
+        timings.append(time.perf_counter() - start)
+    return timings, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=27)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    my_app.warm_up()
+    countries = list(datasets.statistics_cube().countries[:args.countries])
+    arguments = (countries[0], countries[1:], datasets.EDUCATION_LEVELS, ["Female", "Male"])
+    # The undecorated callback, so neither the figure cache nor the static export answers
+    bulk_figure = inspect.unwrap(historical_overview.callback_education_chart)
+    results = [("go.Scatter", measure(per_trace_figure, arguments, args.repeat)),
+               ("bulk scattergl", measure(bulk_figure, arguments, args.repeat))]
+
+    print(f"{len(countries)} countries x {len(datasets.EDUCATION_LEVELS)} levels x 2 genders "
+          f"= {len(countries) * len(datasets.EDUCATION_LEVELS) * 2} lines, x {args.repeat}")
+    print(f"{'version':<16}{'p50 ms':>9}{'max ms':>9}{'bytes':>9}{'gzipped':>9}")
+    for name, (timings, payload) in results:
+        print(f"{name:<16}{statistics.median(timings) * 1000:>9.1f}{max(timings) * 1000:>9.1f}"
+              f"{len(payload):>9}{len(gzip.compress(payload.encode())):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Time and payload size of callback_gap_chart against the per-year trace version.
+
+Run from the repository root:
+
+    python benchmarks/bench_gap_chart.py [--repeat 5]
+
+``legacy_gap_chart`` is the previous implementation (one scatter trace per
+year, two mask scans per year), kept here only as the reference.
+"""
+import argparse
+import inspect
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datasets  # noqa: E402
+import my_app  # noqa: E402 - imports the pages
+
+historical_overview = sys.modules["pages.HistoricalOverview"]
+
+
+def legacy_gap_chart(selected_country_main):
+    data_gender_wages = datasets.gender_wages()
+    data_temp = data_gender_wages[(data_gender_wages['Country'] == selected_country_main) &
+                                  (data_gender_wages['Year'].isin(np.arange(2000, 2021)))]
+    fig = px.scatter(data_temp, x='Year', y='Wage', color='Gender',
+                     color_discrete_sequence=[historical_overview.color2, historical_overview.color3],
+                     hover_data=None)
+    fig.update_traces(hovertemplate=None, hoverinfo='skip', marker={'size': 12})
+
+    for year, data in data_temp.groupby('Year'):
+        women_wage = data_temp[(data_temp['Gender'] == 'Female') & (data_temp['Year'] == year)]['Wage'].values
+        man_wage = data_temp[(data_temp['Gender'] == 'Male') & (data_temp['Year'] == year)]['Wage'].values
+        if len(women_wage) == 0 or pd.isnull(women_wage[0]):
+            continue
+        fig.add_trace(go.Scatter(
+            x=[year, year], y=[women_wage[0], man_wage[0]], mode='lines',
+            line=dict(color=historical_overview.color1), showlegend=False,
+            hovertemplate=f"<b>Year:</b> {year}<br>"
+                          + f"<b>Women's Wage:</b> {women_wage[0]:.2f}<br>"
+                          + f"<b>Men's Wage:</b> {man_wage[0]:.2f}<br>"
+                          + f"<b>Wage Gap Diff:</b> {man_wage[0] - women_wage[0]:.2f}<extra></extra>'"))
+    fig.update_layout(hovermode='x', autosize=False, width=700, height=500)
+    return fig
+
+
+def measure(function, countries, repeat):
+    timings, sizes, traces = [], [], []
+    for _ in range(repeat):
+        for country in countries:
+            start = time.perf_counter()
+            payload = to_json_plotly(function(country))
+            timings.append(time.perf_counter() - start)
+            sizes.append(len(payload))
+    for country in countries:
+        traces.append(len(function(country).data))
+    return timings, sizes, traces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    my_app.warm_up()
+    # Every country of the dropdown, including those without wages
+    countries = list(datasets.statistics_cube().countries)
+    # The undecorated callback, so neither the figure cache nor the static export answers
+    gap_chart = inspect.unwrap(historical_overview.callback_gap_chart)
+    results = [("per-year traces", measure(legacy_gap_chart, countries, args.repeat)),
+               ("single trace", measure(gap_chart, countries, args.repeat))]
+
+    print(f"{len(countries)} countries x {args.repeat}, build + serialize")
+    print(f"{'version':<18}{'p50 ms':>9}{'p95 ms':>9}{'bytes p50':>11}{'traces':>8}")
+    for name, (timings, sizes, traces) in results:
+        timings.sort()
+        print(f"{name:<18}{statistics.median(timings) * 1000:>9.2f}{timings[int(len(timings) * 0.95)] * 1000:>9.2f}"
+              f"{statistics.median(sizes):>11.0f}{statistics.median(traces):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
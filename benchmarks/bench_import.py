@@ -0,0 +1,98 @@
+"""Import-time profile of the app against a budget.
+
+Run from the repository root:
+
+    python benchmarks/bench_import.py [--repeat 5] [--budget-ms 400] [--top 15]
+
+``import my_app`` runs in a fresh interpreter under ``python -X importtime``,
+from a scratch working directory so nothing depends on the directory the app is
+started from. The budget applies to the app's own share of the import, i.e. the
+time spent after Dash, Flask and dash-bootstrap-components are imported; those
+are paid by any Dash app. The datasets, pandas, plotly.express and PIL must not
+be imported until a page is first used (or ``my_app.warm_up()`` runs), so the
+script also fails when one of them shows up. Component libraries such as
+dash_daq are imported with the pages: Dash only serves the JS bundles of the
+libraries registered before the first request. The time of the
+warm-up itself is printed for reference.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ("pandas", "plotly.express", "PIL", "openpyxl")
+
+PROFILE = """
+import time
+start = time.perf_counter()
+import dash, dash_bootstrap_components, flask_compress
+framework = time.perf_counter()
+import my_app
+app = time.perf_counter()
+my_app.warm_up()
+warm = time.perf_counter()
+print(framework - start, app - framework, warm - app)
+"""
+
+
+def parse_importtime(stderr):
+    """Return ``{module: (self_us, cumulative_us)}`` from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "| imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def profile(workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROFILE], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    framework, app, warm = map(float, result.stdout.split())
+    return framework, app, warm, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=400, help="budget for the app's own import time")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    # importtime output of the imports before the warm-up only
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [profile(workdir) for _ in range(args.repeat)]
+        before_warm_up = subprocess.run([sys.executable, "-X", "importtime", "-c", "import my_app"], cwd=workdir,
+                                        env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True,
+                                        check=True)
+    modules = parse_importtime(before_warm_up.stderr)
+
+    framework = statistics.median(run[0] for run in runs) * 1000
+    app = statistics.median(run[1] for run in runs) * 1000
+    warm = statistics.median(run[2] for run in runs) * 1000
+    print(f"{'import dash, dbc, flask_compress':<36}{framework:>9.1f} ms")
+    print(f"{'import my_app (after the framework)':<36}{app:>9.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"{'my_app.warm_up()':<36}{warm:>9.1f} ms")
+
+    print("\nslowest modules under import my_app (by self time, one run)")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {name:<50}{self_us / 1000:>8.1f} ms self{cumulative_us / 1000:>9.1f} ms cumulative")
+
+    failures = []
+    if app > args.budget_ms:
+        failures.append(f"import my_app took {app:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    failures += [f"{name} is imported by import my_app" for name in DEFERRED_MODULES if name in modules]
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Concurrent users against the Dash callback endpoint, per gunicorn worker model.
+
+Run from the repository root:
+
+    python benchmarks/bench_load.py [--users 1 4 16] [--duration 20] [--models sync threaded gevent]
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000 --users 8     # an already running server
+
+For every worker model a single gunicorn worker is started on ``my_app:server``
+(with ``gunicorn.conf.py``, so the datasets are preloaded and warmed up like in
+production) and driven by ``--users`` simulated users at once. Each user
+replays sessions the way the browser does: it loads a page (``_dash-layout``,
+``_dash-dependencies``, the page content callback and the callbacks fired on
+load), then changes the country, drags the date slider through a few years
+without pausing, compares a few countries in the education chart, or hovers
+over the Women&Enterprise map, with ``--think`` seconds between actions. The
+callbacks an action fires are read from ``_dash-dependencies``, so a change
+that is handled client-side sends no request, as in the browser.
+
+Throughput, p50/p99 latency and the error rate are printed per callback and in
+total. ``threaded`` is gunicorn's ``gthread`` worker with ``--threads``
+threads; ``gevent`` is skipped when gevent is not installed. Every server gets
+an empty figure cache of its own, unless ``--no-figure-cache`` disables it.
+"""
+import argparse
+import contextlib
+import importlib.util
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_MODELS = {
+    "sync": lambda threads: ["--worker-class", "sync"],
+    "threaded": lambda threads: ["--worker-class", "gthread", "--threads", str(threads)],
+    "gevent": lambda threads: ["--worker-class", "gevent", "--worker-connections", "1000"],
+}
+UPDATE_PATH = "/_dash-update-component"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve(model, threads, figure_cache, startup_timeout=120):
+    """Run one gunicorn worker of ``model`` on a free port and yield its URL."""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, GEA_FIGURE_CACHE=os.path.join(cache_dir, "figures.sqlite3") if figure_cache else "")
+        command = [sys.executable, "-m", "gunicorn", "my_app:server", "--workers", "1",
+                   "--bind", f"127.0.0.1:{port}", "--log-level", "warning", *WORKER_MODELS[model](threads)]
+        server = subprocess.Popen(command, cwd=ROOT, env=env)
+        url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"gunicorn ({model}) exited with status {server.returncode}")
+                try:
+                    if requests.get(url + "/", timeout=5).ok:
+                        break
+                except requests.ConnectionError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"gunicorn ({model}) did not answer within {startup_timeout}s")
+                time.sleep(0.2)
+            yield url
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def parse_outputs(output):
+    # "id.prop" for one output, "..a.prop...b.prop.." for several
+    if output.startswith(".."):
+        return [tuple(part.rsplit(".", 1)) for part in output[2:-2].split("...")], True
+    return [tuple(output.rsplit(".", 1))], False
+
+
+def callback_label(output):
+    outputs, _ = parse_outputs(output)
+    label = ".".join(outputs[0])
+    return label + f" (+{len(outputs) - 1})" if len(outputs) > 1 else label
+
+
+def walk_layout(component, state, ids):
+    """Record the props of every component with an id under ``component``."""
+    if isinstance(component, list):
+        for child in component:
+            walk_layout(child, state, ids)
+    elif isinstance(component, dict) and "props" in component:
+        props = component["props"]
+        component_id = props.get("id")
+        if isinstance(component_id, str):
+            ids.add(component_id)
+            state.update(((component_id, name), value) for name, value in props.items() if name != "children")
+        for value in props.values():
+            walk_layout(value, state, ids)
+
+
+def option_values(options):
+    return [option["value"] if isinstance(option, dict) else option for option in options or []]
+
+
+class User:
+    """One simulated browser: its component state, and the timings of its requests."""
+
+    def __init__(self, url, think, drag_steps, rng):
+        self.url = url
+        self.think = think
+        self.drag_steps = drag_steps
+        self.rng = rng
+        self.session = requests.Session()
+        self.timings = {}
+        self.errors = {}
+        self.state = {}
+        self.callbacks = []
+
+    def request(self, label, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url + path, timeout=60, **kwargs)
+        except requests.RequestException:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            return None
+        duration = time.perf_counter() - start
+        # 204 is a callback that raised PreventUpdate
+        if response.status_code >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            return None
+        self.timings.setdefault(label, []).append(duration)
+        return response
+
+    def post_callback(self, callback, changed):
+        outputs, multi = parse_outputs(callback["output"])
+        body = {
+            "output": callback["output"],
+            "outputs": [{"id": i, "property": p} for i, p in outputs] if multi else
+            {"id": outputs[0][0], "property": outputs[0][1]},
+            "inputs": [dict(item, value=self.state.get((item["id"], item["property"])))
+                       for item in callback["inputs"]],
+            "state": [dict(item, value=self.state.get((item["id"], item["property"])))
+                      for item in callback["state"]],
+            "changedPropIds": [f"{i}.{p}" for i, p in changed],
+        }
+        response = self.request(callback["label"], "POST", UPDATE_PATH, json=body)
+        if response is None or response.status_code == 204:
+            return {}
+        updated = {}
+        for component_id, props in response.json().get("response", {}).items():
+            for name, value in props.items():
+                updated[(component_id, name)] = value
+        return updated
+
+    def fire(self, changed, initial_ids=()):
+        """Send the callbacks the browser sends for ``changed`` props, then for their outputs in turn."""
+        changed = set(changed)
+        while changed:
+            updated, new_ids = {}, set()
+            for callback in self.callbacks:
+                inputs = {(item["id"], item["property"]) for item in callback["inputs"]}
+                triggered = inputs & changed
+                initial = (not callback["prevent_initial_call"] and initial_ids
+                           and any(item["id"] in initial_ids for item in callback["inputs"])
+                           and all(key in self.state or key[1] == "value" for key in inputs))
+                if not (triggered or initial):
+                    continue
+                for key, value in self.post_callback(callback, triggered).items():
+                    updated[key] = value
+                    if key[1] == "children":
+                        walk_layout(value, self.state, new_ids)
+            self.state.update(updated)
+            changed, initial_ids = set(updated), new_ids
+
+    def set(self, component_id, prop, value):
+        self.state[(component_id, prop)] = value
+        self.fire([(component_id, prop)])
+
+    def load_page(self, path):
+        self.state = {}
+        self.request(f"GET {path}", "GET", path)
+        layout = self.request("GET _dash-layout", "GET", "/_dash-layout")
+        dependencies = self.request("GET _dash-dependencies", "GET", "/_dash-dependencies")
+        if layout is None or dependencies is None:
+            return False
+        # Client-side callbacks run in the browser and never reach the server
+        self.callbacks = [dict(callback, label=callback_label(callback["output"]), state=callback.get("state", []))
+                          for callback in dependencies.json() if not callback.get("clientside_function")]
+        ids = set()
+        walk_layout(layout.json(), self.state, ids)
+        # dcc.Location reports the path on mount, which renders the page content
+        self.state[("_pages_location", "pathname")] = path
+        self.state[("_pages_location", "search")] = ""
+        self.fire([("_pages_location", "pathname"), ("_pages_location", "search")], ids)
+        return True
+
+    def pause(self):
+        time.sleep(self.rng.uniform(0.5, 1.5) * self.think)
+
+    def historical_session(self):
+        if not self.load_page("/"):
+            return
+        countries = option_values(self.state.get(("selected_country_main", "options")))
+        for _ in range(self.rng.randint(1, 3)):
+            self.pause()
+            action = self.rng.choice(("country", "drag", "drag", "compare"))
+            if action == "country" and countries:
+                self.set("selected_country_main", "value", self.rng.choice(countries))
+            elif action == "drag":
+                first = self.state.get(("date_slider", "min"), 2000)
+                last = self.state.get(("date_slider", "max"), 2020)
+                year = self.rng.randint(first, last)
+                step = self.rng.choice((-1, 1))
+                # updatemode="drag" sends every year the handle crosses, without pause
+                for _ in range(self.drag_steps):
+                    year = min(last, max(first, year + step))
+                    self.set("date_slider", "value", year)
+            elif action == "compare" and countries:
+                self.set("selected_country_secondary", "value", self.rng.sample(countries, min(3, len(countries))))
+
+    def enterprise_session(self):
+        if not self.load_page("/womenandenterprise"):
+            return
+        figure = self.state.get(("mapGraph", "figure")) or {}
+        traces = figure.get("data") or [{}]
+        locations = traces[0].get("locations") or []
+        if isinstance(locations, dict):
+            locations = []
+        for _ in range(self.rng.randint(3, 10)):
+            self.pause()
+            if locations:
+                location = self.rng.choice(locations)
+                self.set("mapGraph", "hoverData", {"points": [{"curveNumber": 0, "location": location}]})
+            if self.rng.random() < 0.3:
+                self.set("map_year", "value", self.rng.randint(2000, 2020))
+
+    def run(self, deadline, weights):
+        sessions = (self.historical_session, self.enterprise_session)
+        while time.monotonic() < deadline:
+            self.rng.choices(sessions, weights)[0]()
+
+
+def run_load(url, users, duration, think, drag_steps, weights, seed):
+    """Drive ``url`` with ``users`` simulated users for ``duration`` seconds and merge their results."""
+    simulated = [User(url, think, drag_steps, random.Random(seed + i)) for i in range(users)]
+    start = time.monotonic()
+    deadline = start + duration
+    threads = [threading.Thread(target=user.run, args=(deadline, weights)) for user in simulated]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    timings, errors = {}, {}
+    for user in simulated:
+        for label, values in user.timings.items():
+            timings.setdefault(label, []).extend(values)
+        for label, count in user.errors.items():
+            errors[label] = errors.get(label, 0) + count
+    return timings, errors, elapsed
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report(title, timings, errors, elapsed):
+    print(title)
+    print(f"  {'request':<40}{'count':>7}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    rows = sorted(set(timings) | set(errors))
+    everything = sorted(value for values in timings.values() for value in values)
+    for label, values in [(label, sorted(timings.get(label, []))) for label in rows] + [("total", everything)]:
+        failed = sum(errors.values()) if label == "total" else errors.get(label, 0)
+        count = len(values) + failed
+        p50 = f"{statistics.median(values) * 1000:.1f}" if values else "-"
+        p99 = f"{percentile(values, 0.99) * 1000:.1f}" if values else "-"
+        print(f"  {label[:39]:<40}{count:>7}{count / elapsed:>8.1f}{p50:>9}{p99:>9}"
+              f"{failed / count if count else 0:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load an already running server instead of starting gunicorn")
+    parser.add_argument("--models", nargs="+", choices=list(WORKER_MODELS), default=list(WORKER_MODELS))
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16], help="concurrent users (default 1 4 16)")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per run (default 20)")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between user actions (default 0.5)")
+    parser.add_argument("--drag-steps", type=int, default=8, help="slider values sent per drag (default 8)")
+    parser.add_argument("--threads", type=int, default=8, help="threads of the threaded worker (default 8)")
+    parser.add_argument("--mix", type=float, nargs=2, default=(3, 1), metavar=("HISTORICAL", "ENTERPRISE"),
+                        help="relative weights of the two page sessions (default 3 1)")
+    parser.add_argument("--no-figure-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def load(url, name):
+        for users in args.users:
+            timings, errors, elapsed = run_load(url, users, args.duration, args.think, args.drag_steps,
+                                                args.mix, args.seed)
+            report(f"{name}, {users} concurrent users, {elapsed:.1f}s", timings, errors, elapsed)
+
+    if args.url:
+        load(args.url.rstrip("/"), args.url)
+        return
+    for model in args.models:
+        if model == "gevent" and importlib.util.find_spec("gevent") is None:
+            print("gevent: skipped, gevent is not installed")
+            continue
+        with serve(model, args.threads, not args.no_figure_cache) as url:
+            load(url, f"{model} worker" + (f" ({args.threads} threads)" if model == "threaded" else ""))
+
+
+if __name__ == "__main__":
+    main()
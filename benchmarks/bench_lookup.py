@@ -0,0 +1,66 @@
+"""Per-lookup latency of the indicator cube against the boolean mask lookup.
+
+Run from the repository root:
+
+    python benchmarks/bench_lookup.py [--repeat 3]
+
+Every country/year pair is looked up once per repetition, both the way the
+callbacks used to (two full-length masks ANDed, then ``.values[0]``) and
+through ``datasets.statistics_cube()``.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datasets  # noqa: E402
+
+INDICATOR = 'Female Employment to population ratio (%)'
+
+
+def per_lookup(lookup, pairs, repeat):
+    timings = []
+    for _ in range(repeat):
+        for country, year in pairs:
+            start = time.perf_counter()
+            lookup(country, year)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = datasets.gender_statistics()
+    cube = datasets.statistics_cube()
+    pairs = [(country, int(year)) for country in cube.countries for year in cube.years]
+
+    def mask_lookup(country, year):
+        return df[(df['Country Name'] == country) & (df['Year'] == year)][INDICATOR].values[0]
+
+    def cube_lookup(country, year):
+        return cube.value(country, year, INDICATOR)
+
+    def cube_series(country, year):
+        return cube.series(country, INDICATOR)
+
+    results = [("mask", per_lookup(mask_lookup, pairs, args.repeat)),
+               ("cube.value", per_lookup(cube_lookup, pairs, args.repeat)),
+               ("cube.series", per_lookup(cube_series, pairs, args.repeat))]
+
+    baseline = statistics.median(results[0][1])
+    print(f"{len(pairs)} country/year pairs x {args.repeat}")
+    print(f"{'lookup':<14}{'p50 us':>10}{'p95 us':>10}{'speed-up':>10}")
+    for name, timings in results:
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(len(timings) * 0.95)]
+        print(f"{name:<14}{p50 * 1e6:>10.2f}{p95 * 1e6:>10.2f}{baseline / p50:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
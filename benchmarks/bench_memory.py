@@ -0,0 +1,94 @@
+"""Report the resident memory of each gunicorn worker, with and without preload.
+
+Run from the repository root (Linux only, it reads /proc/<pid>/smaps_rollup):
+
+    python benchmarks/bench_memory.py [--workers 4]
+
+The "before" run uses an empty gunicorn configuration, the "after" run the
+repository's gunicorn.conf.py (preload_app plus gc.freeze). For each run a
+local gunicorn is started, every worker is warmed up with a few
+page and callback requests, and RSS, PSS (RSS with shared pages split between
+the processes sharing them) and USS (private memory) are printed per worker.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+
+
+def memory_of(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), uss
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as file:
+        return [int(pid) for pid in file.read().split()]
+
+
+def warm_up(requests_per_worker, workers):
+    payload = {"output": "gaugeChart.figure",
+               "outputs": {"id": "gaugeChart", "property": "figure"},
+               "inputs": [{"id": "selected_country_main", "property": "value", "value": "Portugal"},
+                          {"id": "date_slider", "property": "value", "value": 2020}],
+               "changedPropIds": ["date_slider.value"]}
+    for _ in range(requests_per_worker * workers):
+        requests.get(f"http://127.0.0.1:{PORT}/", timeout=30)
+        requests.post(f"http://127.0.0.1:{PORT}/_dash-update-component", json=payload, timeout=30)
+
+
+def measure(config, workers):
+    command = [sys.executable, "-m", "gunicorn", "my_app:server", "--bind", f"127.0.0.1:{PORT}",
+               "--workers", str(workers), "--config", config]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                requests.get(f"http://127.0.0.1:{PORT}/", timeout=5)
+                break
+            except requests.ConnectionError:
+                if time.time() > deadline:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+        warm_up(5, workers)
+        return [memory_of(pid) for pid in worker_pids(process.pid)]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".py") as empty_config:
+        runs = [("before (no preload)", measure(empty_config.name, args.workers)),
+                ("after (gunicorn.conf.py)", measure(os.path.join(ROOT, "gunicorn.conf.py"), args.workers))]
+
+    for name, results in runs:
+        print(name)
+        print(f"  {'worker':<8}{'RSS MiB':>10}{'PSS MiB':>10}{'USS MiB':>10}")
+        for i, (rss, pss, uss) in enumerate(results):
+            print(f"  {i:<8}{rss / 1024:>10.1f}{pss / 1024:>10.1f}{uss / 1024:>10.1f}")
+        total_pss = sum(pss for _, pss, _ in results)
+        print(f"  total worker PSS: {total_pss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
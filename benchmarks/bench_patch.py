@@ -0,0 +1,69 @@
+"""Payload size and serialization time of full slider figures against dash.Patch updates.
+
+Run from the repository root:
+
+    python benchmarks/bench_patch.py [--repeat 3]
+
+For every country and year the gauge and both donuts are built either as full
+figures (as before) or as the ``dash.Patch`` updates the callbacks now send
+against the skeleton figures in the layout, and serialized the way Dash
+serializes a callback response.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import my_app  # noqa: E402 - imports the pages
+
+historical_overview = sys.modules["pages.HistoricalOverview"]
+
+
+def full_figures(snapshot):
+    return (historical_overview.gauge_figure(snapshot["law_index"], snapshot["law_index_average"]),
+            historical_overview.donut_figure(snapshot["management"], snapshot["management_text"]),
+            historical_overview.donut_figure(snapshot["parliament"], snapshot["parliament_text"]))
+
+
+def patches(snapshot):
+    return (historical_overview.gauge_patch(snapshot["law_index"], snapshot["law_index_average"]),
+            historical_overview.donut_patch(snapshot["management"], snapshot["management_text"]),
+            historical_overview.donut_patch(snapshot["parliament"], snapshot["parliament_text"]))
+
+
+def measure(function, snapshots, repeat):
+    timings, sizes = [], []
+    for _ in range(repeat):
+        for snapshot in snapshots:
+            start = time.perf_counter()
+            payload = to_json_plotly(function(snapshot))
+            timings.append(time.perf_counter() - start)
+            sizes.append(len(payload))
+    return timings, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    my_app.warm_up()
+    snapshots = [historical_overview.country_year_snapshot(country, year)
+                 for country, year in historical_overview.country_year_domain()]
+    results = [("full figures", measure(full_figures, snapshots, args.repeat)),
+               ("dash.Patch", measure(patches, snapshots, args.repeat))]
+
+    print(f"{len(snapshots)} country/years x {args.repeat}, gauge + 2 donuts, build + serialize")
+    print(f"{'version':<15}{'p50 ms':>9}{'p95 ms':>9}{'bytes p50':>11}{'bytes max':>11}")
+    for name, (timings, sizes) in results:
+        timings.sort()
+        print(f"{name:<15}{statistics.median(timings) * 1000:>9.3f}{timings[int(len(timings) * 0.95)] * 1000:>9.3f}"
+              f"{statistics.median(sizes):>11.0f}{max(sizes):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Bytes per callback response with plotly's default template versus the app's.
+
+Run from the repository root:
+
+    python benchmarks/bench_payload.py
+
+Every server callback is requested through ``_dash-update-component`` with the
+initial values of its inputs from the page layouts, as on a first page load.
+"before" builds the figures with plotly's default template and asks for an
+uncompressed response, "after" uses ``theme.TEMPLATE`` and gzip.
+"""
+import json
+import os
+import sys
+
+import plotly.io as pio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import my_app  # noqa: E402
+import theme  # noqa: E402
+
+
+def initial_values(component, values):
+    """Collect the initial property values of every component with an id."""
+    if isinstance(component, list):
+        for child in component:
+            initial_values(child, values)
+    elif isinstance(component, dict) and "props" in component:
+        props = component["props"]
+        if "id" in props:
+            values[props["id"]] = props
+        for prop in props.values():
+            initial_values(prop, values)
+    return values
+
+
+def parse_outputs(output):
+    if output.startswith(".."):
+        return [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in output[2:-2].split("...")]
+    return dict(zip(("id", "property"), output.rsplit(".", 1)))
+
+
+def main():
+    client = my_app.server.test_client()
+    client.get("/_dash-dependencies")  # registers the callbacks in app.callback_map
+
+    values = {}
+    for page in my_app.dash.page_registry.values():
+        layout = page["layout"]() if callable(page["layout"]) else page["layout"]
+        initial_values(json.loads(my_app.dash._utils.to_json(layout)), values)
+
+    requests = []
+    for output, entry in my_app.app.callback_map.items():
+        inputs = entry["inputs"]
+        if not all(item["id"] in values for item in inputs) or entry.get("callback") is None:
+            continue
+        body = {"output": output, "outputs": parse_outputs(output), "changedPropIds": [],
+                "inputs": [dict(item, value=values[item["id"]].get(item["property"])) for item in inputs]}
+        requests.append((entry["callback"].__name__, body))
+
+    def sizes(template, encoding):
+        pio.templates.default = template
+        return [len(client.post("/_dash-update-component", json=body, headers={"Accept-Encoding": encoding}).data)
+                for _, body in requests]
+
+    before = sizes("plotly", "identity")
+    template_only = sizes(theme.TEMPLATE_NAME, "identity")
+    after = sizes(theme.TEMPLATE_NAME, "gzip")
+
+    print(f"{'callback':<30}{'before':>9}{'template':>10}{'+ gzip':>9}")
+    for (name, _), b, t, a in zip(requests, before, template_only, after):
+        print(f"{name:<30}{b:>9}{t:>10}{a:>9}")
+    print(f"{'total':<30}{sum(before):>9}{sum(template_only):>10}{sum(after):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare the start-up data loading of the pages against the snapshot cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--repeat 5]
+
+"read_excel" is what every worker paid before the snapshot cache: the
+statistics workbook parsed once per page plus the wages workbook. "cold" builds
+the snapshots from scratch and "warm" is a normal restart that reuses them.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datasets  # noqa: E402
+
+STATISTICS_PATH = os.path.join(datasets.ASSETS_DIR, "Data_Gender_Statistics.xlsx")
+WAGES_PATH = os.path.join(datasets.ASSETS_DIR, "Data_Gender_Wages.xlsx")
+# One entry per read the pages performed at import time.
+STARTUP_READS = [STATISTICS_PATH, STATISTICS_PATH, WAGES_PATH]
+
+
+def time_it(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        def read_excel():
+            for path in STARTUP_READS:
+                pd.read_excel(path)
+
+        def cold():
+            for name in os.listdir(snapshot_dir):
+                os.unlink(os.path.join(snapshot_dir, name))
+            for path in STARTUP_READS:
+                datasets.read_excel_cached(path, snapshot_dir=snapshot_dir)
+
+        def warm():
+            for path in STARTUP_READS:
+                datasets.read_excel_cached(path, snapshot_dir=snapshot_dir)
+
+        results = [("read_excel", time_it(read_excel, args.repeat)),
+                   ("snapshot (cold)", time_it(cold, args.repeat)),
+                   ("snapshot (warm)", time_it(warm, args.repeat))]
+
+    baseline = statistics.median(results[0][1])
+    print(f"{'path':<18}{'median ms':>12}{'min ms':>10}{'speed-up':>10}")
+    for name, timings in results:
+        median = statistics.median(timings)
+        print(f"{name:<18}{median * 1000:>12.1f}{min(timings) * 1000:>10.1f}{baseline / median:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
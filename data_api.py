@@ -0,0 +1,182 @@
+"""Read-only HTTP access to the data behind the dashboard.
+
+``/api/<dataset>`` returns a slice of ``statistics`` (the gender statistics,
+one column per series) or ``wages`` (the Female and Male wages and their Gap),
+one row per country and year, as JSON or CSV::
+
+    /api/statistics?country=Portugal&country=Spain&series=Proportion of seats held by women in national parliaments (%)&from=2010&to=2020
+    /api/wages?country=Portugal&format=csv
+
+``country`` and ``series`` can be repeated and default to every country and
+series; ``from`` and ``to`` bound the years (inclusive); ``format`` is ``json``
+(default) or ``csv``. Country/years without any of the selected series are left
+out, missing values are ``null`` (empty in CSV). ``/api/<dataset>/series``
+lists the countries, years and series of a dataset.
+
+Slices are read from the :class:`datasets.IndicatorCube` of the current
+dataset version and streamed one country at a time. Every response carries an
+ETag made of the dataset key (``datasets.Dataset.key``, the same in every
+worker) and the normalized query, so a conditional GET with ``If-None-Match``
+is answered with a 304 before any data is read, until the datasets change.
+"""
+import csv
+import hashlib
+import io
+import json
+
+import numpy as np
+from flask import Response, jsonify, request
+
+import datasets
+
+ROUTE = "/api/<dataset>"
+SERIES_ROUTE = "/api/<dataset>/series"
+
+DATASETS = {
+    "statistics": datasets.statistics_cube,
+    "wages": datasets.wages_cube,
+}
+FORMATS = {
+    "json": "application/json",
+    "csv": "text/csv",
+}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _error(message, status=400):
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
+
+
+def _plain_values(values):
+    """Return ``values`` as Python floats (None for NaN) without float32 noise.
+
+    Most columns are kept as float32 (``datasets.compact``), so their float64
+    copies in the cube print as 53.09999847; those are given as the shortest
+    float32 representation (53.1) instead.
+    """
+    single = values.astype(np.float32)
+    rounds_trip = single.astype(float) == values
+    return [None if value != value else float(str(short)) if exact else value
+            for value, short, exact in zip(values.tolist(), single, rounds_trip)]
+
+
+def parse_query(cube, args):
+    """Return the ``(countries, years, series, format)`` the query string selects."""
+    countries = args.getlist("country") or list(cube.countries)
+    series = args.getlist("series") or list(cube.indicators)
+    unknown = [country for country in countries if country not in cube.countries]
+    if unknown:
+        raise QueryError(f"unknown country: {', '.join(unknown)}")
+    unknown = [name for name in series if name not in cube.indicators]
+    if unknown:
+        raise QueryError(f"unknown series: {', '.join(unknown)}")
+
+    try:
+        first = int(args.get("from", cube.years[0]))
+        last = int(args.get("to", cube.years[-1]))
+    except ValueError:
+        raise QueryError("from and to must be years") from None
+    years = [int(year) for year in cube.years if first <= year <= last]
+
+    output_format = args.get("format", "json")
+    if output_format not in FORMATS:
+        raise QueryError(f"format must be one of {', '.join(FORMATS)}")
+    return list(dict.fromkeys(countries)), years, list(dict.fromkeys(series)), output_format
+
+
+def slice_rows(cube, countries, years, series):
+    """Yield the ``[country, year, *values]`` rows of the slice, one list per country."""
+    if not years:
+        return
+    block = cube.block(countries, series)[:, years[0] - int(cube.years[0]):years[-1] - int(cube.years[0]) + 1]
+    for country, values in zip(countries, block):
+        present = ~np.isnan(values).all(axis=1)
+        columns = [_plain_values(column) for column in values[present].T]
+        yield [[country, year, *row] for year, *row in zip(np.array(years)[present].tolist(), *columns)]
+
+
+def _json_chunks(dataset, key, series, countries_rows):
+    # {"dataset": ..., "version": ..., "rows": [{"Country": ..., "Year": ..., <series>: ...}, ...]}
+    yield json.dumps({"dataset": dataset, "version": key})[:-1] + ', "rows": ['
+    columns = ["Country", "Year", *series]
+    separator = ""
+    for rows in countries_rows:
+        if rows:
+            yield separator + ", ".join(json.dumps(dict(zip(columns, row))) for row in rows)
+            separator = ", "
+    yield "]}"
+
+
+def _csv_chunks(header, countries_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for rows in countries_rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def _etag(key, dataset, query):
+    return hashlib.sha256(json.dumps([key, dataset, query]).encode()).hexdigest()[:32]
+
+
+def _not_modified(etag):
+    return Response(status=304) if etag in request.if_none_match else None
+
+
+def _cache_headers(response, etag):
+    # Clients revalidate every time, which costs a 304 while the data is unchanged
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def serve_slice(dataset):
+    if dataset not in DATASETS:
+        return _error(f"unknown dataset: {dataset}", 404)
+    # Pin the cube and its version now, the body is generated after the view returns
+    cube = DATASETS[dataset]()
+    key = datasets.current().key
+    try:
+        countries, years, series, output_format = parse_query(cube, request.args)
+    except QueryError as error:
+        return _error(str(error))
+
+    etag = _etag(key, dataset, [countries, years, series, output_format])
+    response = _not_modified(etag)
+    if response is None:
+        rows = slice_rows(cube, countries, years, series)
+        if output_format == "csv":
+            chunks = _csv_chunks(["Country", "Year", *series], rows)
+        else:
+            chunks = _json_chunks(dataset, key, series, rows)
+        response = Response(chunks, mimetype=FORMATS[output_format])
+        if output_format == "csv":
+            response.headers["Content-Disposition"] = f'inline; filename="{dataset}.csv"'
+    return _cache_headers(response, etag)
+
+
+def serve_series(dataset):
+    if dataset not in DATASETS:
+        return _error(f"unknown dataset: {dataset}", 404)
+    cube = DATASETS[dataset]()
+    key = datasets.current().key
+    etag = _etag(key, dataset, "series")
+    response = _not_modified(etag) or jsonify(dataset=dataset, version=key, countries=list(cube.countries),
+                                             years=cube.years.tolist(), series=list(cube.indicators))
+    return _cache_headers(response, etag)
+
+
+def register(server):
+    """Add the data API routes to the Flask ``server``."""
+    server.add_url_rule(ROUTE, "data_api", serve_slice)
+    server.add_url_rule(SERIES_ROUTE, "data_api_series", serve_series)
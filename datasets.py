@@ -0,0 +1,491 @@
+"""Loading layer for the Excel datasets shipped in ``assets/``.
+
+``Data_Gender_Statistics.xlsx`` is compiled from the World Bank extract by
+``etl.py``. Every page reads its data through :func:`gender_statistics` and
+:func:`gender_wages` (or the :class:`IndicatorCube` indexes built over them by
+:func:`statistics_cube` and :func:`wages_cube`, and the per-year statistics of
+:func:`statistics_aggregates`), which load each dataset once per process and
+apply one canonical column map. The returned frames are shared by all pages, so treat
+them as read-only. Loading them before forking (``my_app.warm_up()``) means
+that, with gunicorn's ``preload_app``, they are built once in the master and
+shared copy-on-write by the forked workers (see ``gunicorn.conf.py``).
+
+All of them come from one :class:`Dataset` version. A watcher thread
+(:func:`start_watcher`) polls the source files and, when they change, loads
+them in the background and swaps the new version in atomically, without
+restarting the workers. Each request stays on the version it started with,
+and caches made with :func:`version_cache` are dropped on the swap. A reloaded
+version is private to the worker that loaded it.
+
+pandas is only imported by the functions that build frames, so importing this
+module (and the pages) stays cheap until the first dataset is loaded.
+
+Parsing the workbooks through openpyxl dominates the start-up time of every
+worker, so the first load of a workbook compiles it into a columnar ``.npz``
+snapshot under ``.cache/snapshots``. Later loads read the snapshot instead, as
+long as the source workbook is unchanged: the snapshot records the source
+mtime, size and SHA-256, and is rebuilt as soon as the contents differ.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+from flask import g, has_request_context
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+SNAPSHOT_DIR = os.environ.get("GEA_SNAPSHOT_DIR", os.path.join(BASE_DIR, ".cache", "snapshots"))
+STATISTICS_PATH = os.path.join(ASSETS_DIR, "Data_Gender_Statistics.xlsx")
+WAGES_PATH = os.path.join(ASSETS_DIR, "Data_Gender_Wages.xlsx")
+SOURCE_PATHS = (STATISTICS_PATH, WAGES_PATH)
+# Seconds between two checks of the source files by the watcher, 0 to disable it.
+RELOAD_INTERVAL = float(os.environ.get("GEA_RELOAD_INTERVAL", 5))
+
+# Bump when the on-disk layout changes so old snapshots get rebuilt.
+SNAPSHOT_FORMAT = 1
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"format": SNAPSHOT_FORMAT, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def snapshot_path(path, snapshot_dir=None):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, name + ".npz")
+
+
+def _write_snapshot(df, target, meta):
+    import pandas as pd
+
+    arrays = {"__meta__": np.array(json.dumps(meta)),
+              "__columns__": np.array([str(column) for column in df.columns])}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            arrays[f"c{i}"] = values.to_numpy()
+        else:
+            # Strings are stored as fixed-width unicode plus a missing-value mask,
+            # so the snapshot never needs pickle to be read back.
+            arrays[f"c{i}"] = values.fillna("").astype(str).to_numpy(dtype=str)
+            arrays[f"m{i}"] = values.isna().to_numpy()
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write next to the target and rename, so concurrent workers never read a
+    # half written snapshot.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **arrays)
+            # On disk before the rename, so a crash cannot leave a truncated snapshot
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _save_snapshot(df, target, meta):
+    # A snapshot only speeds the next load up; a read-only deploy still loads.
+    try:
+        _write_snapshot(df, target, meta)
+    except OSError as error:
+        logger.warning("Could not write the snapshot %s: %s", target, error)
+
+
+def _read_snapshot(snapshot):
+    import pandas as pd
+
+    columns = snapshot["__columns__"].tolist()
+    data = {}
+    for i, column in enumerate(columns):
+        values = snapshot[f"c{i}"]
+        if f"m{i}" in snapshot.files:
+            values = pd.Series(values).mask(snapshot[f"m{i}"])
+        data[column] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_excel_cached(path, snapshot_dir=None):
+    """Return ``pd.read_excel(path)``, served from a snapshot when possible."""
+    import pandas as pd
+
+    target = snapshot_path(path, snapshot_dir)
+    stamp = _source_stamp(path)
+
+    if os.path.exists(target):
+        try:
+            with np.load(target, allow_pickle=False) as snapshot:
+                meta = json.loads(snapshot["__meta__"].item())
+                if meta["format"] == SNAPSHOT_FORMAT:
+                    if meta["mtime_ns"] == stamp["mtime_ns"] and meta["size"] == stamp["size"]:
+                        return _read_snapshot(snapshot)
+                    # The file was touched; only rebuild when its contents changed.
+                    digest = file_digest(path)
+                    if meta["sha256"] == digest:
+                        df = _read_snapshot(snapshot)
+                        _save_snapshot(df, target, dict(stamp, sha256=digest))
+                        return df
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # Corrupt, truncated or foreign file: fall through and rebuild it.
+            pass
+
+    digest = file_digest(path)
+    df = pd.read_excel(path)
+    _save_snapshot(df, target, dict(stamp, sha256=digest))
+    return df
+
+
+# Short names used by the pages for the World Bank series.
+STATISTICS_COLUMNS = {
+    'Employment to population ratio, 15+, female (%) (national estimate)': 'Female Employment to population ratio (%)',
+    'Employment to population ratio, 15+, male (%) (national estimate)': 'Male Employment to population ratio (%)',
+    'Female share of employment in senior and middle management (%)': 'Female % in senior and middle management',
+    'Labor force with advanced education, female (% of female working-age population with advanced education)': 'Advanced Education (% of female)',
+    'Labor force with basic education, female (% of female working-age population with basic education)': 'Basic Education (% of female)',
+    'Labor force with intermediate education, female (% of female working-age population with intermediate education)': 'Intermediate Education (% of female)',
+    'Labor force with advanced education, male (% of male working-age population with advanced education)': 'Advanced Education (% of male)',
+    'Labor force with basic education, male (% of male working-age population with basic education)': 'Basic Education (% of male)',
+    'Labor force with intermediate education, male (% of male working-age population with intermediate education)': 'Intermediate Education (% of male)',
+    'Law mandates equal remuneration for females and males for work of equal value (1=yes; 0=no)': 'Law mandates wages equality',
+    'Population, total': 'Total Population',
+    'Population ages 15-64, total': 'Total Population(15-64 years old)',
+    'Share of female business owners (% of total business owners)': 'Female Business Owners (%)',
+    'Share of female directors (% of total directors)': 'Female directors (%)',
+    'Share of female sole proprietors  (% of sole proprietors)': 'Female Sole Proprietors (%)'
+}
+
+
+# Most decimals any page shows. Float columns are kept as float32 when that
+# leaves every value unchanged at up to this many decimals.
+DISPLAY_DECIMALS = 2
+
+
+def compact(df, categorical=()):
+    """Return ``df`` with the smallest dtypes that keep the values the pages show.
+
+    ``categorical`` columns become categoricals, integers are downcast to the
+    smallest integer type and floats to float32 where precision allows.
+    """
+    import pandas as pd
+
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column in categorical:
+            values = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            narrow = values.astype(np.float32)
+            if all(np.array_equal(np.round(narrow.to_numpy(dtype=float), decimals), np.round(values.to_numpy(), decimals),
+                                  equal_nan=True)
+                   for decimals in range(DISPLAY_DECIMALS + 1)):
+                values = narrow
+        columns[column] = values
+    return pd.DataFrame(columns)
+
+
+def _load_statistics():
+    return compact(read_excel_cached(STATISTICS_PATH).rename(columns=STATISTICS_COLUMNS),
+                   categorical=("Country Name", "Country Code"))
+
+
+def _load_wages():
+    return compact(read_excel_cached(WAGES_PATH), categorical=("Country", "Gender"))
+
+
+class IndicatorCube:
+    """Dense (country x year x indicator) array over a long country/year frame.
+
+    Built once per dataset, so callbacks can read a single value or a whole
+    time series by position instead of masking the frame on every call. Missing
+    country/year combinations are NaN.
+    """
+
+    def __init__(self, df, country_column="Country Name", year_column="Year"):
+        import pandas as pd
+
+        countries = pd.Index(df[country_column].drop_duplicates().astype(str))
+        self.years = np.arange(int(df[year_column].min()), int(df[year_column].max()) + 1)
+        self.indicators = pd.Index([column for column in df.columns
+                                    if column != year_column and pd.api.types.is_numeric_dtype(df[column])])
+        self.countries = countries
+
+        self._country_position = {country: i for i, country in enumerate(countries)}
+        self._indicator_position = {indicator: i for i, indicator in enumerate(self.indicators)}
+        self._first_year = int(self.years[0])
+
+        self.values = np.full((len(countries), len(self.years), len(self.indicators)), np.nan)
+        rows = countries.get_indexer(df[country_column].astype(str))
+        columns = df[year_column].to_numpy() - self._first_year
+        self.values[rows, columns] = df[self.indicators].to_numpy(dtype=float)
+        self.values.flags.writeable = False
+
+    def _year_position(self, year):
+        position = int(year) - self._first_year
+        if not 0 <= position < len(self.years):
+            raise KeyError(year)
+        return position
+
+    def value(self, country, year, indicator):
+        """Return the indicator value of one country in one year."""
+        return self.values[self._country_position[country], self._year_position(year),
+                           self._indicator_position[indicator]]
+
+    def series(self, country, indicator):
+        """Return the indicator of one country for every year in ``self.years``."""
+        return self.values[self._country_position[country], :, self._indicator_position[indicator]]
+
+    def matrix(self, indicator):
+        """Return the (country x year) matrix of one indicator."""
+        return self.values[:, :, self._indicator_position[indicator]]
+
+    def year_values(self, year, indicator):
+        """Return the indicator of every country (in ``self.countries`` order) in one year."""
+        return self.values[:, self._year_position(year), self._indicator_position[indicator]]
+
+    def block(self, countries, indicators):
+        """Return the (country x year x indicator) array of several countries and indicators at once."""
+        rows = [self._country_position[country] for country in countries]
+        columns = [self._indicator_position[indicator] for indicator in indicators]
+        return self.values[rows][:, :, columns]
+
+
+class AggregateCube:
+    """Per-year statistics of every indicator of an :class:`IndicatorCube`, over all its countries.
+
+    Computed once per dataset, so a reference value (the mean of a year, its
+    median, a percentile...) is a single lookup. Countries without a value in
+    a year are left out; a statistic with no value at all is NaN.
+    """
+
+    PERCENTILES = (10, 25, 75, 90)
+    STATISTICS = ("count", "mean", "median", "min", "max", *(f"p{q}" for q in PERCENTILES))
+
+    def __init__(self, cube):
+        import warnings
+
+        self.years = cube.years
+        self.indicators = cube.indicators
+        self._cube = cube
+        self._statistic_position = {statistic: i for i, statistic in enumerate(self.STATISTICS)}
+
+        values = cube.values
+        with warnings.catch_warnings():
+            # Years in which no country has a value give NaN, which is what we want
+            warnings.simplefilter("ignore", RuntimeWarning)
+            percentiles = np.nanpercentile(values, self.PERCENTILES, axis=0)
+            self.values = np.stack([np.count_nonzero(~np.isnan(values), axis=0).astype(float),
+                                    np.nanmean(values, axis=0), np.nanmedian(values, axis=0),
+                                    np.nanmin(values, axis=0), np.nanmax(values, axis=0), *percentiles])
+        self.values.flags.writeable = False
+
+    def value(self, statistic, year, indicator):
+        """Return one statistic of the indicator in one year."""
+        return self.values[self._statistic_position[statistic], self._cube._year_position(year),
+                           self._cube._indicator_position[indicator]]
+
+    def series(self, statistic, indicator):
+        """Return one statistic of the indicator for every year in ``self.years``."""
+        return self.values[self._statistic_position[statistic], :, self._cube._indicator_position[indicator]]
+
+
+def _wages_cube(wages):
+    wages = wages.astype({'Gender': str}).pivot_table(index=['Country', 'Year'], columns='Gender',
+                                                     values='Wage', dropna=False, observed=True).reset_index()
+    wages.columns.name = None
+    wages['Gap'] = wages['Male'] - wages['Female']
+    return IndicatorCube(wages, country_column="Country")
+
+
+EDUCATION_LEVELS = ["Basic", "Intermediate", "Advanced"]
+
+
+class Dataset:
+    """One consistent version of every dataset and of the indexes built over it.
+
+    ``version`` counts the reloads of this process; ``key`` identifies the
+    contents of the source files, so it is the same in every worker.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        # Taken before reading, so a file replaced while loading is reloaded later
+        self.stamps = _source_stamps()
+        self.sources = {os.path.basename(path): file_digest(path) for path in SOURCE_PATHS}
+        self.key = hashlib.sha256(json.dumps(self.sources, sort_keys=True).encode()).hexdigest()[:16]
+        self.gender_statistics = _load_statistics()
+        self.gender_wages = _load_wages()
+        self.statistics_cube = IndicatorCube(self.gender_statistics)
+        self.statistics_aggregates = AggregateCube(self.statistics_cube)
+        self.wages_cube = _wages_cube(self.gender_wages)
+
+
+_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_dataset = None
+_version_caches = []
+
+
+def latest():
+    """Return the newest loaded :class:`Dataset`, loading the first one if needed."""
+    global _dataset
+    if _dataset is None:
+        with _lock:
+            if _dataset is None:
+                _dataset = Dataset(1)
+    return _dataset
+
+
+def current():
+    """Return the :class:`Dataset` the current request works on.
+
+    The newest version is pinned to a request the first time it asks, so every
+    lookup of one callback sees the same data even if a reload swaps a new
+    version in meanwhile. Outside of a request this is :func:`latest`.
+    """
+    if not has_request_context():
+        return latest()
+    if "dataset" not in g:
+        g.dataset = latest()
+    return g.dataset
+
+
+def gender_statistics():
+    """Return the shared country/year statistics frame with canonical column names."""
+    return current().gender_statistics
+
+
+def gender_wages():
+    """Return the shared wages frame (Country, Year, Wage, Gender)."""
+    return current().gender_wages
+
+
+def statistics_cube():
+    """Return the :class:`IndicatorCube` over :func:`gender_statistics`."""
+    return current().statistics_cube
+
+
+def statistics_aggregates():
+    """Return the :class:`AggregateCube` of :func:`statistics_cube`, per year over all countries."""
+    return current().statistics_aggregates
+
+
+def wages_cube():
+    """Return the wages pivoted into an :class:`IndicatorCube` keyed by country.
+
+    Its indicators are the ``Female`` and ``Male`` wages and their ``Gap``
+    (male minus female).
+    """
+    return current().wages_cube
+
+
+def version_cache(maxsize=None):
+    """``functools.lru_cache`` for values derived from the datasets.
+
+    Entries are keyed on the version of :func:`current` as well, so a cached
+    value never outlives the data it was computed from, and the whole cache is
+    dropped when a reload swaps a new version in.
+    """
+    def decorator(function):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(version, *args):
+            return function(*args)
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            return cached(current().version, *args)
+
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        _version_caches.append(cached)
+        return wrapper
+
+    return decorator
+
+
+def clear_version_caches():
+    """Empty every :func:`version_cache`, e.g. to time the values they hold from scratch."""
+    for cache in _version_caches:
+        cache.cache_clear()
+
+
+def reload():
+    """Load the source files again and swap them in as a new version.
+
+    Returns the new :class:`Dataset`, or None when the contents did not change.
+    Requests already running keep the version they started with.
+    """
+    global _dataset
+    with _reload_lock:
+        previous = latest()
+        dataset = Dataset(previous.version + 1)
+        if dataset.sources == previous.sources:
+            return None
+        with _lock:
+            _dataset = dataset
+        clear_version_caches()
+    logger.info("Datasets reloaded as version %d (%s)", dataset.version, dataset.key)
+    return dataset
+
+
+def _source_stamps():
+    stamps = {}
+    for path in SOURCE_PATHS:
+        try:
+            stat = os.stat(path)
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+def watch(interval=RELOAD_INTERVAL, on_reload=None):
+    """Poll the source files every ``interval`` seconds and :func:`reload` on changes.
+
+    ``on_reload`` is called after a new version was swapped in, e.g. to build
+    the page caches for it ahead of the first request. The files are compared
+    with the stamps of the loaded version, not with their state when the watch
+    starts: a worker forked from a master that loaded them earlier reloads at the
+    first poll if they changed in between.
+    """
+    stamps = _dataset.stamps if _dataset is not None else _source_stamps()
+    while True:
+        time.sleep(interval)
+        new_stamps = _source_stamps()
+        if new_stamps == stamps:
+            continue
+        stamps = new_stamps
+        try:
+            if reload() is not None and on_reload is not None:
+                on_reload()
+        except Exception:  # noqa: BLE001 - e.g. a half copied workbook; retried on the next change
+            logger.exception("Reloading the datasets failed, keeping version %d", latest().version)
+
+
+def start_watcher(interval=RELOAD_INTERVAL, on_reload=None):
+    """Run :func:`watch` in a daemon thread, unless ``interval`` is 0."""
+    if not interval:
+        return None
+    thread = threading.Thread(target=watch, args=(interval, on_reload), name="dataset-watcher", daemon=True)
+    thread.start()
+    return thread
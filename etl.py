@@ -0,0 +1,213 @@
+"""Compile the World Bank Gender Statistics extract into the dataset the app reads.
+
+Repeatable replacement for the export steps of
+``test_graphs_data_sources/DataPreparation.ipynb``::
+
+    python etl.py [--source test_graphs_data_sources/P_Data_Extract_From_Gender_Statistics.xlsx]
+                  [--out assets/Data_Gender_Statistics.xlsx] [--first-year 2000] [--last-year 2020] [--full]
+
+The source workbook has one row per (series, country) with one column per year,
+``..`` standing for a missing value. It is streamed row by row with openpyxl's
+read-only mode. Each row is hashed and compared with the manifest of the last
+run (``.cache/etl/``), and only the (series, country) rows that were added,
+changed or removed are written into the previously compiled dataset. The
+output has the notebook's layout: one row per country and year, one column per
+series, all-empty rows and columns dropped, everything sorted.
+
+A full rebuild runs when there is no manifest, when the year range changed,
+when the compiled dataset was modified by something else, or with ``--full``.
+Every run prints the rows read per second and the peak memory of the process.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import resource
+import tempfile
+import time
+
+import datasets
+
+SOURCE_PATH = os.path.join(datasets.BASE_DIR, "test_graphs_data_sources", "P_Data_Extract_From_Gender_Statistics.xlsx")
+MANIFEST_DIR = os.path.join(datasets.BASE_DIR, ".cache", "etl")
+SOURCE_SHEET = "Data"
+MISSING = ".."
+FIRST_YEAR = 2000
+LAST_YEAR = 2020
+
+# Bump when the manifest or the compiled layout changes, to force a full rebuild.
+MANIFEST_FORMAT = 1
+
+_YEAR_HEADER = re.compile(r"^(\d{4}) \[YR\d{4}\]$")
+
+
+def manifest_path(out):
+    name = os.path.splitext(os.path.basename(out))[0]
+    return os.path.join(MANIFEST_DIR, name + ".json")
+
+
+def stream_rows(path, years):
+    """Yield ``(series, country, code, values)`` for every data row of the extract.
+
+    ``values`` holds the row's value for each of ``years``, None where missing.
+    The footer rows of the extract (no series or country) are skipped.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[SOURCE_SHEET].iter_rows(values_only=True)
+        header = next(rows)
+        columns = {name: i for i, name in enumerate(header)}
+        year_columns = {int(match.group(1)): i for i, match in
+                        ((i, _YEAR_HEADER.match(str(name))) for i, name in enumerate(header)) if match}
+        positions = [year_columns.get(year) for year in years]
+        series_column, country_column, code_column = (columns["Series Name"], columns["Country Name"],
+                                                      columns["Country Code"])
+
+        for row in rows:
+            series, country = row[series_column], row[country_column]
+            if series is None or country is None:
+                continue
+            values = [None if position is None or row[position] in (None, MISSING) else float(row[position])
+                      for position in positions]
+            yield series, country, row[code_column], values
+    finally:
+        workbook.close()
+
+
+def row_digest(code, values):
+    return hashlib.sha1(json.dumps([code, values]).encode()).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else None
+
+
+def _write_atomic(path, write):
+    # Write next to the target and rename, so the app never reads a half written file.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def apply_changes(base, changed, removed, years):
+    """Return the compiled dataset ``base`` with the changed and removed rows applied.
+
+    ``base`` is the previous compiled frame (None for a full build), ``changed``
+    a list of ``(series, country, code, values)`` rows and ``removed`` a list of
+    ``(series, country)`` pairs that are no longer in the source.
+    """
+    import pandas as pd
+
+    if base is None:
+        base = pd.DataFrame(columns=["Country Name", "Country Code", "Year"])
+    codes = dict(zip(base["Country Name"], base["Country Code"]))
+    table = base.drop(columns="Country Code").set_index(["Country Name", "Year"]).astype(float)
+
+    records = []
+    for series, country, code, values in changed:
+        codes[country] = code
+        records += [(country, year, series, value) for year, value in zip(years, values)]
+    if records:
+        patch = pd.DataFrame.from_records(records, columns=["Country Name", "Year", "Series Name", "Value"])
+        patch = patch.set_index(["Country Name", "Year", "Series Name"])["Value"].unstack("Series Name").astype(float)
+        table = table.reindex(index=table.index.union(patch.index), columns=table.columns.union(patch.columns))
+        countries = table.index.get_level_values("Country Name")
+        changed_countries = {}
+        for series, country, _, _ in changed:
+            changed_countries.setdefault(series, set()).add(country)
+        for series, series_countries in changed_countries.items():
+            rows = countries.isin(list(series_countries))
+            table.loc[rows, series] = patch[series].reindex(table.index[rows]).to_numpy()
+
+    countries = table.index.get_level_values("Country Name")
+    for series, country in removed:
+        if series in table.columns:
+            table.loc[countries == country, series] = float("nan")
+
+    table = table.dropna(how="all").dropna(axis=1, how="all")
+    table = table.sort_index().sort_index(axis=1)
+    table.columns.name = None
+    compiled = table.reset_index()
+    compiled.insert(1, "Country Code", compiled["Country Name"].map(codes))
+    compiled["Year"] = compiled["Year"].astype("int64")
+    return compiled
+
+
+def compile_dataset(source, out, first_year=FIRST_YEAR, last_year=LAST_YEAR, full=False):
+    """Bring ``out`` up to date with ``source`` and return the run statistics."""
+    years = list(range(first_year, last_year + 1))
+    manifest_file = manifest_path(out)
+    manifest = None if full else load_manifest(manifest_file)
+    incremental = (manifest is not None and manifest["years"] == years and manifest["output"] == os.path.abspath(out)
+                   and os.path.exists(out) and datasets.file_digest(out) == manifest["output_sha256"])
+    previous = manifest["rows"] if incremental else {}
+
+    start = time.perf_counter()
+    current, changed, rows_read = {}, [], 0
+    for series, country, code, values in stream_rows(source, years):
+        rows_read += 1
+        digest = row_digest(code, values)
+        current.setdefault(series, {})[country] = digest
+        if previous.get(series, {}).get(country) != digest:
+            changed.append((series, country, code, values))
+    read_seconds = time.perf_counter() - start
+    removed = [(series, country) for series, countries in previous.items()
+               for country in countries if country not in current.get(series, {})]
+
+    stats = {"mode": "incremental" if incremental else "full", "rows_read": rows_read,
+             "rows_per_second": rows_read / read_seconds if read_seconds else float("inf"),
+             "changed": len(changed), "removed": len(removed), "written": False}
+    if not incremental or changed or removed:
+        base = datasets.read_excel_cached(out) if incremental else None
+        compiled = apply_changes(base, changed, removed, years)
+        _write_atomic(out, lambda path: compiled.to_excel(path, index=False))
+        stats.update(written=True, output_rows=len(compiled), output_columns=len(compiled.columns))
+
+    manifest = {"format": MANIFEST_FORMAT, "source": os.path.basename(source), "years": years,
+                "output": os.path.abspath(out), "output_sha256": datasets.file_digest(out), "rows": current}
+
+    def write_manifest(path):
+        with open(path, "w") as file:
+            json.dump(manifest, file)
+
+    _write_atomic(manifest_file, write_manifest)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--out", default=datasets.STATISTICS_PATH)
+    parser.add_argument("--first-year", type=int, default=FIRST_YEAR)
+    parser.add_argument("--last-year", type=int, default=LAST_YEAR)
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and rebuild everything")
+    args = parser.parse_args()
+
+    stats = compile_dataset(args.source, args.out, args.first_year, args.last_year, args.full)
+    print(f"{stats['mode']} run: {stats['rows_read']} source rows read ({stats['rows_per_second']:.0f} rows/s), "
+          f"{stats['changed']} changed, {stats['removed']} removed")
+    if stats["written"]:
+        print(f"wrote {args.out} ({stats['output_rows']} rows x {stats['output_columns']} columns)")
+    else:
+        print(f"{args.out} is up to date")
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{stats['seconds']:.2f}s, peak memory {peak_kib / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
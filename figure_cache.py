@@ -0,0 +1,207 @@
+"""Figure cache shared by every gunicorn worker on the machine.
+
+Page callbacks decorated with :func:`memoize` store their serialized output in
+a SQLite database, keyed by the callback, the version of its code
+(:func:`code_version`), its inputs and the dataset version
+(``datasets.Dataset.key``, which is the same in every worker). A figure built
+by one worker is served to all of them until the datasets or the code change.
+The database is bounded to ``GEA_FIGURE_CACHE_MB`` (default 64) MiB. When it
+grows past that, the least recently used entries are evicted.
+
+``GEA_FIGURE_CACHE`` sets the database path (default
+``.cache/figure_cache.sqlite3``). Set it to an empty string to disable the
+cache. When the database cannot be opened or written, the figures are computed
+as if there was no cache. Hits, misses and evictions are counted per callback
+in each process and exported on ``/metrics``.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import datasets
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.environ.get("GEA_FIGURE_CACHE", os.path.join(datasets.BASE_DIR, ".cache", "figure_cache.sqlite3"))
+MAX_BYTES = int(float(os.environ.get("GEA_FIGURE_CACHE_MB", 64)) * 1024 * 1024)
+# Part of every key. Bump it when figures change through code outside of the
+# callback's own module (the theme, shared helpers...), so old entries are not
+# served after a deploy; changes to the module itself are picked up on their own.
+CACHE_FORMAT = 1
+# Seconds a hit may wait before its ``last_used`` refresh is written.
+TOUCH_INTERVAL = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS figures (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS figures_last_used ON figures (last_used);
+"""
+
+_local = threading.local()
+_lock = threading.Lock()
+# callback -> [hits, misses, evictions]
+_counters = {}
+# key -> time of its last hit, not written yet
+_touches = {}
+_touches_flushed = time.monotonic()
+
+
+def _connection():
+    # One connection per thread and process; connections must not cross a fork.
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.pid != os.getpid():
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        connection = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        _local.connection, _local.pid = connection, os.getpid()
+    return connection
+
+
+def _count(callback, index, amount=1):
+    with _lock:
+        _counters.setdefault(callback, [0, 0, 0])[index] += amount
+
+
+def _take_touches():
+    global _touches_flushed
+    with _lock:
+        touches = [(used, key) for key, used in _touches.items()]
+        _touches.clear()
+        _touches_flushed = time.monotonic()
+    return touches
+
+
+def _flush_touches(connection):
+    # Outside of a transaction of put(), one short write for all the pending hits
+    touches = _take_touches()
+    if not touches:
+        return
+    try:
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany("UPDATE figures SET last_used = ? WHERE key = ?", touches)
+    except sqlite3.Error:
+        # Only the eviction order suffers
+        logger.warning("Figure cache could not record %d hits", len(touches), exc_info=True)
+
+
+def get(key):
+    """Return the cached payload (a JSON string) under ``key``, or None.
+
+    Hits refresh ``last_used`` in batches, at most every ``TOUCH_INTERVAL``
+    seconds or with the next :func:`put`, so reads do not take the write lock
+    shared by every worker.
+    """
+    connection = _connection()
+    row = connection.execute("SELECT payload FROM figures WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    with _lock:
+        _touches[key] = time.time()
+        due = time.monotonic() - _touches_flushed >= TOUCH_INTERVAL
+    if due:
+        _flush_touches(connection)
+    return row[0]
+
+
+def put(key, payload):
+    """Store ``payload`` under ``key`` and return how many entries were evicted to fit it."""
+    connection = _connection()
+    touches = _take_touches()
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.executemany("UPDATE figures SET last_used = ? WHERE key = ?", touches)
+        connection.execute("INSERT OR REPLACE INTO figures VALUES (?, ?, ?, ?)",
+                           (key, payload, len(payload), time.time()))
+        # Keep the most recently used entries that fit in MAX_BYTES, evict the rest
+        evicted = connection.execute(
+            "DELETE FROM figures WHERE key IN ("
+            " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running FROM figures)"
+            " WHERE running > ?)", (MAX_BYTES,)).rowcount
+    return evicted
+
+
+def code_version(function):
+    """Return a digest of the code that builds ``function``'s figures.
+
+    Covers the source of the callback's module, the plotly version (which
+    serializes the figures) and :data:`CACHE_FORMAT`, so a deploy changing any
+    of them does not serve figures cached by the previous code.
+    """
+    import plotly
+
+    digest = hashlib.sha256(f"{CACHE_FORMAT}:{plotly.__version__}:".encode())
+    # The module of the callback itself, under decorators such as static_export's
+    with open(inspect.unwrap(function).__code__.co_filename, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(name, args, version=""):
+    values = json.dumps([name, version, datasets.current().key, args], sort_keys=True, default=str)
+    return hashlib.sha256(values.encode()).hexdigest()
+
+
+def memoize(function):
+    """Serve the callback's output from the shared cache, computing it on a miss.
+
+    Outputs are stored as they are serialized for Dash, and returned parsed,
+    like the outputs of ``static_export``.
+    """
+    from plotly.io.json import to_json_plotly
+
+    name = f"{function.__module__}:{function.__name__}"
+    label = f"{function.__module__.split('.')[-1]}.{function.__name__}"
+    version = code_version(function)
+
+    @functools.wraps(function)
+    def wrapper(*args):
+        if not CACHE_PATH:
+            return function(*args)
+        key = cache_key(name, args, version)
+        try:
+            payload = get(key)
+        except (sqlite3.Error, OSError):
+            logger.exception("Figure cache lookup failed for %s", label)
+            return function(*args)
+        if payload is not None:
+            _count(label, 0)
+            return json.loads(payload)
+
+        _count(label, 1)
+        output = function(*args)
+        try:
+            evicted = put(key, to_json_plotly(output))
+        except (sqlite3.Error, OSError):
+            logger.exception("Figure cache store failed for %s", label)
+        else:
+            if evicted:
+                _count(label, 2, evicted)
+        return output
+
+    return wrapper
+
+
+def stats():
+    """Return ``{callback: {"hits": n, "misses": n, "evictions": n}}`` of this process."""
+    with _lock:
+        return {callback: dict(zip(("hits", "misses", "evictions"), counts))
+                for callback, counts in _counters.items()}
+
+
+def clear():
+    """Remove every entry of the shared cache."""
+    with _connection() as connection:
+        connection.execute("DELETE FROM figures")
@@ -0,0 +1,22 @@
+# gunicorn picks this file up automatically from the working directory
+# (see Procfile). Loading the app in the master and warming its pages up builds
+# the shared datasets once, so the forked workers share their memory pages
+# copy-on-write.
+import gc
+import sys
+
+preload_app = True
+
+
+def when_ready(server):
+    # The pages load their data on first use; do it once here, before forking.
+    sys.modules["my_app"].warm_up()
+    # Move everything allocated while preloading to the permanent generation,
+    # so the collector in the workers never writes to (and un-shares) it.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Each worker watches the datasets and reloads them without a restart. The
+    # thread is started after forking, threads do not survive a fork.
+    sys.modules["my_app"].watch_datasets()
@@ -0,0 +1,144 @@
+"""Per-callback metrics for the Dash app, exposed in Prometheus text format.
+
+Every ``_dash-update-component`` request is timed on the Flask server and
+attributed to the page callback that answered it. For each callback the
+request count, errors, a latency histogram and a histogram of the response
+size as sent (after compression) are served at ``/metrics``, together with the hits, misses and evictions of the
+shared figure cache (``figure_cache.py``). Counters are kept per process, so
+with several gunicorn workers each scrape sees the worker that answered it.
+
+Setting ``GEA_SLOW_CALLBACK_MS`` logs every callback slower than that many
+milliseconds, together with its input values.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+import figure_cache
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+SLOW_CALLBACK_MS = float(os.environ.get("GEA_SLOW_CALLBACK_MS", 0)) or None
+
+
+class Histogram:
+    """Cumulative Prometheus histogram over fixed upper bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class CallbackMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+
+_lock = threading.Lock()
+_callbacks = {}
+
+
+def _callback_label(app, output):
+    entry = app.callback_map.get(output)
+    function = entry and entry.get("callback")
+    if function is None:
+        return output
+    return f"{function.__module__.split('.')[-1]}.{function.__name__}"
+
+
+def record(callback, duration, size, error):
+    with _lock:
+        metrics = _callbacks.get(callback)
+        if metrics is None:
+            metrics = _callbacks[callback] = CallbackMetrics()
+        metrics.calls += 1
+        metrics.errors += error
+        metrics.duration.observe(duration)
+        metrics.size.observe(size)
+
+
+def render():
+    """Return every callback's metrics in Prometheus text format."""
+    lines = [
+        "# HELP dash_callback_requests_total Callback requests answered.",
+        "# TYPE dash_callback_requests_total counter",
+        "# HELP dash_callback_errors_total Callback requests that failed (status >= 500).",
+        "# TYPE dash_callback_errors_total counter",
+        "# HELP dash_callback_duration_seconds Callback request latency.",
+        "# TYPE dash_callback_duration_seconds histogram",
+        "# HELP dash_callback_response_bytes Callback response size as sent, after compression.",
+        "# TYPE dash_callback_response_bytes histogram",
+    ]
+    with _lock:
+        for callback, metrics in sorted(_callbacks.items()):
+            labels = 'callback="{}"'.format(callback.replace("\\", "\\\\").replace('"', '\\"'))
+            lines.append(f"dash_callback_requests_total{{{labels}}} {metrics.calls}")
+            lines.append(f"dash_callback_errors_total{{{labels}}} {metrics.errors}")
+            lines.extend(metrics.duration.lines("dash_callback_duration_seconds", labels))
+            lines.extend(metrics.size.lines("dash_callback_response_bytes", labels))
+
+    for name, description in (("hits", "Callback outputs served from the shared figure cache."),
+                              ("misses", "Callback outputs computed and stored in the shared figure cache."),
+                              ("evictions", "Figure cache entries evicted to store a callback output.")):
+        lines.append(f"# HELP dash_figure_cache_{name}_total {description}")
+        lines.append(f"# TYPE dash_figure_cache_{name}_total counter")
+        for callback, counts in sorted(figure_cache.stats().items()):
+            lines.append(f'dash_figure_cache_{name}_total{{callback="{callback}"}} {counts[name]}')
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app):
+    """Instrument the callbacks of the Dash ``app`` and add the ``/metrics`` route."""
+    server = app.server
+    update_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+    @server.before_request
+    def start_timer():
+        if request.path == update_path:
+            g.callback_start = time.perf_counter()
+
+    def record_callback(response):
+        start = g.pop("callback_start", None)
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        body = request.get_json(silent=True) or {}
+        callback = _callback_label(app, body.get("output", ""))
+        size = response.calculate_content_length() or 0
+        record(callback, duration, size, response.status_code >= 500)
+
+        if SLOW_CALLBACK_MS is not None and duration * 1000 >= SLOW_CALLBACK_MS:
+            inputs = {f"{item.get('id')}.{item.get('property')}": item.get("value")
+                      for item in body.get("inputs", []) if isinstance(item, dict)}
+            logger.warning("Slow callback %s: %.1f ms, %d bytes, inputs %s",
+                           callback, duration * 1000, size, inputs)
+        return response
+
+    # after_request hooks run in reverse order of registration. Going first in
+    # the list makes this one run last, after flask-compress (Dash's
+    # compress=True) has compressed the response, so the size is what is sent.
+    server.after_request_funcs.setdefault(None, []).insert(0, record_callback)
+    server.add_url_rule("/metrics", "metrics", lambda: Response(render(), mimetype="text/plain; version=0.0.4"))
@@ -1,10 +1,20 @@
+import sys
+
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
+import data_api
+import datasets
+import metrics
+import sprites
 
 external_stylesheets = ['assets/style.css']
-app = dash.Dash(__name__, use_pages=True, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.LUX,external_stylesheets])
+app = dash.Dash(__name__, use_pages=True, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.LUX,external_stylesheets],
+                compress=True)
 server = app.server
+sprites.register(server)
+data_api.register(server)
+metrics.init_app(app)
 SIDEBAR_STYLE = {
     "position": "fixed",
     "top": 0,
@@ -56,5 +66,26 @@ app.layout = html.Div(
     ],
     style={"background-color": '#FAF9F9'})
 
+
+def warm_up():
+    """Load the data of every page and build its layout ahead of the first request.
+
+    Pages load lazily, so importing the app stays cheap; gunicorn calls this in
+    the master before forking (see ``gunicorn.conf.py``).
+    """
+    for page in dash.page_registry.values():
+        sys.modules[page["module"]].warm_up()
+
+
+def watch_datasets():
+    """Reload the datasets in the background whenever their files change.
+
+    The pages are warmed up for every new version, before requests ask for it.
+    gunicorn starts this in each worker (see ``gunicorn.conf.py``).
+    """
+    return datasets.start_watcher(on_reload=warm_up)
+
+
 if __name__ == "__main__":
+    watch_datasets()
     app.run(debug=True)
@@ -1,132 +1,179 @@
 import dash
-from dash import dcc, html, callback, Input, Output
+from dash import dcc, html, clientside_callback, ClientsideFunction, Input, Output, State
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import pandas as pd
+# Component libraries register their JS bundles on import, before the app serves
+import dash_daq as daq
+import datasets
+from theme import color1, color3, color5
+import functools
+import math
 import os
 import json
 
 dash.register_page(__name__, name="Women&Enterprise", order=1)
 
-# Define the color pallete
-color1 = '#555B6E'  # Payne's Gray (cinzento escuro)
-color2 = '#FFD6BA'  # Apricot (laranja)
-color3 = '#BEE3DB'  # Mint Green
-color4 = '#89B0AE'  # Cambridge Blue
-color5 = '#FAF9F9'  # Seasalt
 map_colors = ["#b3efe2", "#1f7a67"]
 
-data_gender_statistics_path = os.path.abspath(os.path.join(os.getcwd(), "assets", "Data_Gender_Statistics.xlsx"))
-countries_curiosities_path = os.path.abspath(os.path.join(os.getcwd(), "assets", "countries_Curiosities.json"))
-data_gender_statistics = pd.read_excel(data_gender_statistics_path)
-
-data_gender_statistics = data_gender_statistics.rename(columns={
-    'Employment to population ratio, 15+, female (%) (national estimate)': 'Female Employment to population ratio (%)',
-    'Female share of employment in senior and middle management (%)': 'Female % in senior and middle management',
-    'Labor force with advanced education, female (% of female working-age population with advanced education)': 'Advanced Education (% of female)',
-    'Labor force with basic education, female (% of female working-age population with basic education)': 'Basic Education (% of female)',
-    'Labor force with intermediate education, female (% of female working-age population with intermediate education)': 'Intermediate Education (% of female)',
-    'Labor force with advanced education, male (% of male working-age population with advanced education)': 'Advanced Education (% of male)',
-    'Labor force with basic education, male (% of male working-age population with basic education)': 'Basic Education (% of male)',
-    'Labor force with intermediate education, male (% of male working-age population with intermediate education)': 'Intermediate Education (% of male)',
-    'Law mandates equal remuneration for females and males for work of equal value (1=yes; 0=no)': 'Law mandates wages equality',
-    'Population, total': 'Total Population',
-    'Share of female business owners (% of total business owners)': 'Female Business Owners (%)',
-    'Share of female directors (% of total directors)': 'Female directors (%)',
-    'Share of female sole proprietors  (% of sole proprietors)': 'Female Sole Proprietors (%)'
-})
-
-# open and read the countries curiosities json file
-with open(countries_curiosities_path, 'r') as file:
-    countries_curiosities = json.load(file)
-
-
-year_to_filter=2020
-map_graph = px.choropleth(data_gender_statistics.loc[data_gender_statistics['Year'] == year_to_filter],
-                          locations='Country Name',
-                          color='Total Population',
-                          color_continuous_scale=map_colors,
-                          range_color=(0, 90000000),
-                          scope="europe",
-                          locationmode="country names",
-                          # projection='natural earth',
-                          fitbounds='locations',
-                          hover_name="Country Name",
-                          hover_data={"Country Name": False,"Total Population":False},
-                          )
-map_graph.update_layout(margin={"r": 0, "t": 0, "l": 0, "b": 0},
-                        paper_bgcolor=color5,
-                        plot_bgcolor=color5,
-                        font_family="Roboto",
-                        font_color=color1,
-                        legend_font_size=10,
-                        font_size=15,
-                        autosize=True,
-                        width=835,
-                        height=658,
-                        showlegend=False,
-                        geo={"projection": {"type": "natural earth"}, "bgcolor": 'rgba(0,0,0,0)'},
-                        coloraxis_colorbar={
-                            "len": 0.7,  # adjust height of colorbar
-                            "title": {"text": "Total Population"},  # set colorbar title orientation
-                            "title_font": {"size": 15},
-                            "tickfont": {"size": 15}
-                        },
-                        dragmode=False
-                        )
-map_graph.update_geos(showcountries=False, showcoastlines=False, showland=False, fitbounds="locations",
-                      projection_rotation=dict(lon=0, lat=0, roll=0), lataxis_range=[38, 50], lonaxis_range=[38, 50])
-
-
-layout = dbc.Container(
-    [
-        dbc.Row(html.P("Exploring Entrepreneurship along European Union",className="chart-title"),
-                style={"padding-top":"32px","padding-left": "12px"}),
-        dbc.Row([
-            dbc.Col(dcc.Graph(id='mapGraph', figure=map_graph, className="map"),
-                    width=8),
-            dbc.Col([
-                dbc.Row(html.Div(id="country_text"),className="h-50",style={"padding-bottom":"30px"}),
-                dcc.Graph(id='table', className="table")],
-                width=4)
-        ])
-    ]
-)
+countries_curiosities_path = os.path.join(datasets.ASSETS_DIR, "countries_Curiosities.json")
+
+# Country and year shown when the page opens
+default_country="Portugal"
+default_year=2020
+
+
+@functools.cache
+def countries_curiosities():
+    # open and read the countries curiosities json file
+    with open(countries_curiosities_path, 'r') as file:
+        return json.load(file)
+
+
+@datasets.version_cache()
+def map_figure():
+    """Build the choropleth once, with one animation frame per year.
+
+    The year slider swaps the frames in the browser (see assets/clientside.js),
+    so changing the year never rebuilds the figure on the server.
+    """
+    import plotly.express as px
+
+    data_gender_statistics = datasets.gender_statistics()
+    map_graph = px.choropleth(data_gender_statistics.sort_values('Year'),
+                              locations='Country Name',
+                              color='Total Population',
+                              color_continuous_scale=map_colors,
+                              range_color=(0, 90000000),
+                              scope="europe",
+                              locationmode="country names",
+                              # projection='natural earth',
+                              fitbounds='locations',
+                              hover_name="Country Name",
+                              hover_data={"Country Name": False,"Total Population":False,"Year":False},
+                              animation_frame='Year',
+                              )
+    # Open on the default year; plotly's own slider and play button are replaced
+    # by the page's year slider, which also drives the table. The frames only
+    # keep what changes between years, the rest is merged from the shown trace.
+    default_frame = next(frame for frame in map_graph.frames if frame.name == str(default_year))
+    frames = [go.Frame(name=frame.name, data=[go.Choropleth(z=trace.z, locations=trace.locations, hovertext=trace.hovertext)
+                                              for trace in frame.data])
+              for frame in map_graph.frames]
+    map_graph = go.Figure(data=default_frame.data, layout=map_graph.layout, frames=frames)
+    map_graph.update_layout(autosize=True,
+                            width=835,
+                            height=658,
+                            showlegend=False,
+                            geo={"projection": {"type": "natural earth"}, "bgcolor": 'rgba(0,0,0,0)'},
+                            coloraxis_colorbar={
+                                "len": 0.7,  # adjust height of colorbar
+                                "title": {"text": "Total Population"},  # set colorbar title orientation
+                                "title_font": {"size": 15},
+                                "tickfont": {"size": 15}
+                            },
+                            dragmode=False,
+                            sliders=[],
+                            updatemenus=[]
+                            )
+    map_graph.update_geos(showcountries=False, showcoastlines=False, showland=False, fitbounds="locations",
+                          projection_rotation=dict(lon=0, lat=0, roll=0), lataxis_range=[38, 50], lonaxis_range=[38, 50])
+    return map_graph
+
+
+def layout(**query_parameters):
+    return page_layout()
+
+
+@datasets.version_cache()
+def page_layout():
+    statistics_cube = datasets.statistics_cube()
+    return dbc.Container(
+        [
+            dbc.Row(html.P("Exploring Entrepreneurship along European Union",className="chart-title"),
+                    style={"padding-top":"32px","padding-left": "12px"}),
+            dbc.Row([
+                html.P("Select the date:", style={"padding-bottom": "15px", "padding-top": "20px"}),
+                daq.Slider(
+                    id="map_year",
+                    min=statistics_cube.years[0],
+                    max=statistics_cube.years[-1],
+                    step=1,
+                    marks={int(i): '{}'.format(i) for i in statistics_cube.years[::5]},
+                    value=default_year,
+                    dots=False,
+                    color=color1,
+                    updatemode="drag",
+                    size=370,
+                    handleLabel={"showCurrentValue": True, "label": "Year"},
+                )
+            ], style={"padding-left": "20px", "padding-bottom": "20px"}),
+            dbc.Row([
+                dbc.Col(dcc.Graph(id='mapGraph', figure=map_figure(), className="map"),
+                        width=8),
+                dbc.Col([
+                    dbc.Row(html.Div(countries_curiosities()[default_country], id="country_text"),className="h-50",
+                            style={"padding-bottom":"30px"}),
+                    dcc.Graph(id='table', figure=table_figure(default_country, default_year), className="table")],
+                    width=4)
+            ]),
+            dcc.Store(id="country_table", data=country_table())
+        ]
+    )
+
+
+def warm_up():
+    """Load the data of the page and build its layout ahead of the first request."""
+    datasets.statistics_cube()
+    country_table()
+    page_layout()
 
 def map10ToYesNo(x):
+    if math.isnan(x):
+        return "NAD"
     if x==1:
         return "Yes"
     else:
         return "No"
 
 
-@callback(
-    Output(component_id='table', component_property='figure'),
-    Output(component_id='country_text', component_property='children'),
-    [Input(component_id='mapGraph', component_property='hoverData')]
+def format_value(x):
+    if math.isnan(x):
+        return "NAD"
+    return f"{x:.2f}"
+
+
+clientside_callback(
+    ClientsideFunction(namespace="enterprise", function_name="show_map_year"),
+    Output('mapGraph', 'figure'),
+    [Input('map_year', 'value')],
+    [State('mapGraph', 'figure')],
+    prevent_initial_call=True
 )
-def callback_table(hover_data):
-    if hover_data is None:
-        country = "Portugal";
-    else:
-        country = hover_data['points'][0]['location']
 
-    country_data = data_gender_statistics[(data_gender_statistics["Country Name"] == country) & (data_gender_statistics["Year"] == year_to_filter)]
 
-    population = country_data["Total Population"].values[0]/1000000
+def country_features(country, year):
+    """Return the table rows (feature name -> shown value) of one country in one year."""
+    statistics_cube = datasets.statistics_cube()
+
+    def country_value(indicator):
+        return statistics_cube.value(country, year, indicator)
+
+    population = country_value("Total Population")/1000000
     # Create a dictionary of the features and their values
-    features = {
-        "Total Population (M)": f"{population:.2f}",
-        "Female Business Owners (%)": f"{country_data['Female Business Owners (%)'].values[0]:.2f}",
-        "Female directors (%)": f"{country_data['Female directors (%)'].values[0]:.2f}",
-        "Female Sole Proprietors (%)": f"{country_data['Female Sole Proprietors (%)'].values[0]:.2f}",
-        "Law mandates wages equality": map10ToYesNo(country_data["Law mandates wages equality"].values[0])
+    return {
+        "Total Population (M)": format_value(population),
+        "Female Business Owners (%)": format_value(country_value('Female Business Owners (%)')),
+        "Female directors (%)": format_value(country_value('Female directors (%)')),
+        "Female Sole Proprietors (%)": format_value(country_value('Female Sole Proprietors (%)')),
+        "Law mandates wages equality": map10ToYesNo(country_value("Law mandates wages equality"))
     }
 
+
+def table_figure(country, year):
+    features = country_features(country, year)
     fig = go.Figure(data=[go.Table(
         columnwidth=[100, 40],
-        header=dict(values=["<b>" + country + "</b>", "<b>" + str(year_to_filter) + "</b>"], line_color=color5,
+        header=dict(values=["<b>" + country + "</b>", "<b>" + str(year) + "</b>"], line_color=color5,
                     fill_color=color3,
                     font_color=color1,font_size=15),
         cells=dict(values=[
@@ -136,21 +183,37 @@ def callback_table(hover_data):
         )
     )
     ])
-    fig.update_layout(autosize=True,height=154,margin=dict(l=0, r=0, t=0, b=0))
-    return fig,countries_curiosities[country];
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    fig.update_layout(autosize=True,height=154)
+    return fig;
+
+
+@datasets.version_cache()
+def country_table():
+    """Return every country's table rows per year and its curiosities text.
+
+    Sent once with the layout; hovering the map and moving the year slider only
+    pick from it in the browser (see assets/clientside.js).
+    """
+    statistics_cube = datasets.statistics_cube()
+    years = [int(year) for year in statistics_cube.years]
+    # Only the countries on the map; the aggregates (e.g. European Union) cannot be hovered
+    countries = [country for country in statistics_cube.countries if country in countries_curiosities()]
+    return {
+        "default_country": default_country,
+        "years": years,
+        "rows": {country: [list(country_features(country, year).values()) for year in years]
+                 for country in countries},
+        "curiosities": {country: countries_curiosities()[country] for country in countries},
+        "figure": table_figure(default_country, default_year).to_plotly_json(),
+    }
 
 
+clientside_callback(
+    ClientsideFunction(namespace="enterprise", function_name="show_country_table"),
+    Output(component_id='table', component_property='figure'),
+    Output(component_id='country_text', component_property='children'),
+    [Input(component_id='mapGraph', component_property='hoverData'),
+     Input(component_id='map_year', component_property='value')],
+    [State(component_id='country_table', component_property='data')],
+    prevent_initial_call=True
+)
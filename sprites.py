@@ -0,0 +1,79 @@
+"""Person-icon sprites of the "Labor Force Participation by Gender" chart.
+
+Each sprite is the empty figure with the filled figure pasted over its bottom
+part, up to a fill level. There are only as many fill levels as the icons have
+pixel rows, so every sprite is rendered once, kept in memory and served from
+``/sprites/<kind>/<row>.png`` with long-lived cache headers and an ETag. The
+``v`` query string changes with the source images, so the URLs can be cached
+as immutable.
+"""
+import functools
+import hashlib
+import io
+import os
+
+from flask import Response, abort, request
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+ROUTE = "/sprites/<kind>/<int:row>.png"
+
+SPRITES = {
+    "women": ("women-figure.png", "women-figure-filled.png"),
+    "men": ("men-figure.png", "men-figure-filled.png"),
+}
+
+
+@functools.cache
+def _images(kind):
+    from PIL import Image
+
+    default_name, filled_name = SPRITES[kind]
+    default = Image.open(os.path.join(ASSETS_DIR, default_name))
+    filled = Image.open(os.path.join(ASSETS_DIR, filled_name))
+    default.load()
+    filled.load()
+    version = hashlib.sha1(default.tobytes() + filled.tobytes()).hexdigest()[:12]
+    return default, filled, version
+
+
+def fill_row(kind, percentage):
+    """Return the first filled pixel row of the ``kind`` icon for a percentage."""
+    _, filled, _ = _images(kind)
+    return int(filled.height * (1 - percentage / 100))
+
+
+def sprite_url(kind, percentage):
+    """Return the URL of the ``kind`` icon filled up to ``percentage``."""
+    version = _images(kind)[2]
+    return f"/sprites/{kind}/{fill_row(kind, percentage)}.png?v={version}"
+
+
+@functools.lru_cache(maxsize=1024)
+def render(kind, row):
+    """Return the PNG bytes and ETag of the ``kind`` icon filled from ``row`` down."""
+    default, filled, _ = _images(kind)
+    # Crop the filled figure to the bottom part and paste it over the empty one
+    figure = default.copy()
+    figure.paste(filled.crop((0, row, filled.width, filled.height)), (0, row))
+
+    buffer = io.BytesIO()
+    figure.save(buffer, format='PNG')
+    body = buffer.getvalue()
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def serve_sprite(kind, row):
+    if kind not in SPRITES or not 0 <= row <= _images(kind)[1].height:
+        abort(404)
+    body, etag = render(kind, row)
+    response = Response(body, mimetype="image/png")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+def register(server):
+    """Add the sprite route to the Flask ``server``."""
+    server.add_url_rule(ROUTE, "sprites", serve_sprite)
@@ -0,0 +1,191 @@
+"""Pre-render every callback of the pages over its whole (finite) input domain.
+
+Page callbacks opt in with the :func:`precomputed` decorator, which records the
+callback together with the list of its possible inputs. The ``build`` command
+runs every registered callback over that domain in a process pool and writes
+the serialized outputs to a content-addressed directory::
+
+    python static_export.py build [--out static_export] [--processes 4]
+
+    static_export/
+        index.json          # callback -> input key -> object hash
+        objects/<sha256>.json
+
+Starting the app with ``GEA_STATIC_EXPORT=static_export`` switches the
+decorated callbacks to serving mode: they answer from the export with a file
+read and only fall back to computing the figure for inputs that are not in it.
+The export records the SHA-256 of the datasets it was built from and is ignored
+while they do not match the dataset version in use (see ``datasets.reload``).
+"""
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+import datasets
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.environ.get("GEA_STATIC_EXPORT")
+
+# name -> (function, domain)
+REGISTRY = {}
+
+
+def callback_name(function):
+    return f"{function.__module__}:{function.__name__}"
+
+
+def input_key(values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def source_digests():
+    return datasets.current().sources
+
+
+@functools.lru_cache(maxsize=4)
+def _load_index(export_dir, dataset_key):
+    # Read once per dataset version; a missing or unreadable index is cached as
+    # empty too, so it is logged once and the callbacks compute their figures.
+    try:
+        with open(os.path.join(export_dir, "index.json")) as file:
+            index = json.load(file)
+        sources = index["sources"]
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        logger.warning("No usable static export index in %s (%s), computing the figures", export_dir, error)
+        return {}
+    if sources != source_digests():
+        logger.warning("Static export in %s was built from other datasets, ignoring it", export_dir)
+        return {}
+    return index["callbacks"]
+
+
+@functools.lru_cache(maxsize=4096)
+def _load_object(export_dir, digest):
+    with open(os.path.join(export_dir, "objects", digest + ".json")) as file:
+        return json.load(file)
+
+
+def precomputed(domain):
+    """Register a callback for the static export.
+
+    ``domain`` returns every tuple of arguments the callback can be called
+    with.
+    """
+    def decorator(function):
+        name = callback_name(function)
+        REGISTRY[name] = (function, domain)
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            if EXPORT_DIR:
+                index = _load_index(EXPORT_DIR, datasets.current().key)
+                digest = index.get(name, {}).get(input_key(args))
+                if digest is not None:
+                    try:
+                        return _load_object(EXPORT_DIR, digest)
+                    except (OSError, ValueError):
+                        logger.warning("Static export object %s of %s is unreadable, computing it", digest, name)
+            return function(*args)
+
+        return wrapper
+
+    return decorator
+
+
+def _render(name, arguments):
+    # Runs in the pool workers, which inherit the imported pages by forking.
+    from plotly.io.json import to_json_plotly
+
+    function, _ = REGISTRY[name]
+    rendered, failed = [], 0
+    for args in arguments:
+        try:
+            payload = to_json_plotly(function(*args))
+        except Exception:  # noqa: BLE001 - inputs the live callback fails on are left out
+            logger.exception("%s failed for %r, left out of the export", name, args)
+            failed += 1
+            continue
+        rendered.append((input_key(args), payload))
+    return name, rendered, failed
+
+
+def _write_atomic(path, text):
+    # Write next to the target and rename, so a serving worker never reads a
+    # half written file.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build(out_dir, processes=None, chunk_size=200):
+    """Render every registered callback into ``out_dir``.
+
+    Returns the index, the number of new objects written and the number of
+    inputs each callback failed on (those are left out of the index).
+    """
+    import my_app  # imports the pages, which register their callbacks
+
+    # Load the data once here, so the forked workers inherit it
+    my_app.warm_up()
+
+    objects_dir = os.path.join(out_dir, "objects")
+    os.makedirs(objects_dir, exist_ok=True)
+
+    jobs = []
+    for name, (_, domain) in REGISTRY.items():
+        arguments = list(domain())
+        jobs += [(name, arguments[i:i + chunk_size]) for i in range(0, len(arguments), chunk_size)]
+
+    callbacks = {name: {} for name in REGISTRY}
+    failures = dict.fromkeys(REGISTRY, 0)
+    written = 0
+    context = multiprocessing.get_context("fork")
+    with concurrent.futures.ProcessPoolExecutor(processes, mp_context=context) as pool:
+        for name, rendered, failed in pool.map(_render, *zip(*jobs)):
+            failures[name] += failed
+            for key, payload in rendered:
+                digest = hashlib.sha256(payload.encode()).hexdigest()
+                path = os.path.join(objects_dir, digest + ".json")
+                if not os.path.exists(path):
+                    _write_atomic(path, payload)
+                    written += 1
+                callbacks[name][key] = digest
+
+    index = {"sources": source_digests(), "callbacks": callbacks}
+    _write_atomic(os.path.join(out_dir, "index.json"), json.dumps(index))
+    return index, written, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="render every callback into the export directory")
+    build_parser.add_argument("--out", default="static_export")
+    build_parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index, written, failures = build(args.out, args.processes)
+    for name, keys in index["callbacks"].items():
+        print(f"{name:<55}{len(keys):>7} inputs" + (f", {failures[name]} failed" if failures[name] else ""))
+    print(f"{written} new objects in {args.out} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    # Run through the importable module, so the pages register their callbacks
+    # in the same REGISTRY that the build (and its forked workers) reads.
+    import static_export
+    static_export.main()
@@ -0,0 +1,42 @@
+"""Colour palette and plotly template shared by the pages.
+
+Every figure embeds its template in the JSON sent to the browser, and plotly's
+default template alone is about 7 kB. ``TEMPLATE`` only keeps the defaults these
+charts rely on, plus the palette, font and background they all used to repeat
+in their own layouts. Importing this module makes it the default template.
+"""
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Define the color pallete
+color1 = '#555B6E'  # Payne's Gray (cinzento escuro)
+color2 = '#FFD6BA'  # Apricot (laranja)
+color3 = '#BEE3DB'  # Mint Green
+color4 = '#89B0AE'  # Cambridge Blue
+color5 = '#FAF9F9'  # Seasalt
+
+TEMPLATE_NAME = "gender_equality"
+
+_axis = dict(gridcolor="white", linecolor="white", ticks="", title=dict(standoff=15), zerolinecolor="white",
+             automargin=True, zerolinewidth=2)
+
+TEMPLATE = go.layout.Template(
+    data=dict(pie=[go.Pie(automargin=True)]),
+    layout=dict(
+        colorway=[color3, color2, color4, color1],
+        font=dict(family="Roboto", color=color1, size=15),
+        paper_bgcolor=color5,
+        plot_bgcolor=color5,
+        margin=dict(l=0, r=0, t=0, b=0),
+        autotypenumbers="strict",
+        hovermode="closest",
+        hoverlabel=dict(align="left"),
+        xaxis=_axis,
+        yaxis=_axis,
+        coloraxis=dict(colorbar=dict(outlinewidth=0, ticks="")),
+        geo=dict(showlakes=True, lakecolor="white"),
+    ),
+)
+
+pio.templates[TEMPLATE_NAME] = TEMPLATE
+pio.templates.default = TEMPLATE_NAME